@@ -1,27 +1,208 @@
 """
 AWS Billing module for fetching and analyzing billing data.
 """
-import boto3
+import hashlib
+import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from config import config
 
+try:
+    import orjson  # Optional: faster (de)serialization of cached responses
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+__all__ = ['AWSBillingAnalyzer']
+
+
+def _json_loads(data: bytes) -> Any:
+    """Decode JSON bytes, using orjson when it is installed."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Encode an object as JSON bytes, using orjson when it is installed."""
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode('utf-8')
+
+
+def _iter_results(pages: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream ResultsByTime entries across response pages.
+    
+    Args:
+        pages: Pages of a Cost Explorer response
+        
+    Yields:
+        ResultsByTime entries, one page at a time
+    """
+    return chain.from_iterable(page['ResultsByTime'] for page in pages)
+
+
+def _sum_costs_by_key(pages: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Sum grouped costs by group key across all response pages.
+    
+    Args:
+        pages: Pages of a grouped Cost Explorer response
+        
+    Returns:
+        Dict mapping group keys to costs
+    """
+    costs = defaultdict(float)
+    
+    for result in _iter_results(pages):
+        for group in result.get('Groups', []):
+            costs[group['Keys'][0]] += float(group['Metrics']['UnblendedCost']['Amount'])
+    
+    return dict(costs)
+
+
+_ce_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _create_ce_client(aws_access_key_id: str, aws_secret_access_key: str, aws_region: str):
+    """
+    Create a Cost Explorer client; cached per credentials and region.
+    
+    boto3 is imported here rather than at module load so that paths
+    which never reach Cost Explorer don't pay for it.
+    
+    Args:
+        aws_access_key_id: AWS access key ID
+        aws_secret_access_key: AWS secret access key
+        aws_region: AWS region
+        
+    Returns:
+        boto3 Cost Explorer client
+    """
+    import boto3
+    from botocore.config import Config as BotoConfig
+    
+    # Adaptive retries absorb Cost Explorer throttling, and the pool is
+    # sized for the concurrent report requests so connections are reused
+    client_config = BotoConfig(
+        region_name=aws_region,
+        retries={'mode': 'adaptive', 'max_attempts': 10},
+        max_pool_connections=20,
+        connect_timeout=5,
+        read_timeout=30,
+        tcp_keepalive=True
+    )
+    
+    # Create boto3 client with explicit credentials from .env
+    client = boto3.client(
+        'ce',
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+        region_name=aws_region,
+        config=client_config
+    )
+    logger.info("AWS Cost Explorer client initialized with region: %s", aws_region)
+    return client
+
+
+def _get_ce_client(aws_access_key_id: str, aws_secret_access_key: str, aws_region: str):
+    """
+    Get the shared Cost Explorer client, creating it at most once.
+    
+    boto3 clients are thread-safe; the lock only stops concurrent first
+    callers from each building one.
+    
+    Args:
+        aws_access_key_id: AWS access key ID
+        aws_secret_access_key: AWS secret access key
+        aws_region: AWS region
+        
+    Returns:
+        boto3 Cost Explorer client
+    """
+    with _ce_client_lock:
+        return _create_ce_client(aws_access_key_id, aws_secret_access_key, aws_region)
+
+
+def _apply_cost_threshold(costs: Dict[str, float]) -> Dict[str, float]:
+    """
+    Drop entries below the configured minimum cost threshold.
+    
+    Args:
+        costs: Dict mapping keys to costs
+        
+    Returns:
+        Filtered dict
+    """
+    threshold = config.billing.min_cost_threshold
+    return {key: cost for key, cost in costs.items() if cost >= threshold}
+
+
+def _write_cache_entry(cache_dir: str, cache_path: str, pages: List[Dict[str, Any]]) -> None:
+    """
+    Atomically write a Cost Explorer cache entry and prune expired ones.
+    
+    Request dates roll over daily, so old keys are never read again;
+    entries past ``config.billing.cache_max_age_hours`` are deleted here
+    to keep the directory from growing without bound.
+    
+    Args:
+        cache_dir: Cache directory
+        cache_path: Path of the entry to write
+        pages: Response pages to store
+    """
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # A unique temp file per writer, so concurrent threads never share one
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_json_dumps(pages))
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except OSError as e:
+        logger.warning("Could not write Cost Explorer cache entry: %s", e)
+    finally:
+        if tmp_path:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    
+    cutoff = time.time() - config.billing.cache_max_age_hours * 3600
+    try:
+        with os.scandir(cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.json', '.tmp')) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+    except OSError as e:
+        logger.debug("Could not prune Cost Explorer cache: %s", e)
+
 
 class AWSBillingAnalyzer:
     """Analyzes AWS billing data using Cost Explorer API."""
     
-    def __init__(self):
-        """Initialize the AWS billing analyzer using .env credentials."""
+    def __init__(self, period_type: Optional[str] = None, period_count: Optional[int] = None):
+        """
+        Initialize the AWS billing analyzer using .env credentials.
+        
+        Args:
+            period_type: 'd' or 'm'; defaults to config.billing.period_type
+            period_count: Number of periods; defaults to config.billing.period_count
+        """
         # Get AWS credentials from environment variables
         aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
         aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -31,102 +212,263 @@ class AWSBillingAnalyzer:
         if not aws_access_key_id or not aws_secret_access_key:
             raise ValueError("AWS credentials not found in .env file. Please set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
         
-        # Create boto3 client with explicit credentials from .env
-        self.ce_client = boto3.client(
-            'ce',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region
-        )
+        # The boto3 client is created on first use (see ce_client)
+        self._aws_access_key_id = aws_access_key_id
+        self._aws_secret_access_key = aws_secret_access_key
+        self._aws_region = aws_region
+        self._ce_client = None
+        
+        self.period_type = period_type or config.billing.period_type
+        self.period_count = period_count or config.billing.period_count
+        self.start_date, self.end_date = config.get_billing_period(self.period_type, self.period_count)
+        self._start_str = self.start_date.strftime('%Y-%m-%d')
+        self._end_str = self.end_date.strftime('%Y-%m-%d')
+        self._time_period = {'Start': self._start_str, 'End': self._end_str}
+        
+        # Read-only request templates; each query adds only what differs
+        self._ce_base_monthly = MappingProxyType({
+            'TimePeriod': self._time_period,
+            'Granularity': 'MONTHLY',
+            'Metrics': ['UnblendedCost']
+        })
+        self._ce_base_daily = MappingProxyType({**self._ce_base_monthly, 'Granularity': 'DAILY'})
+        
+        # Aggregated Cost Explorer responses shared by several getters. Each
+        # has a lock so concurrent callers wait for one fetch, not race to many.
+        self._daily_by_service = None
+        self._daily_by_service_lock = threading.Lock()
+        self._monthly_by_record_type = None
+        self._monthly_by_record_type_lock = threading.Lock()
+        
+        # Lifetime credit total as (fetched_at, value), reused for memo_ttl_seconds
+        self._credits_used_lifetime = None
+        self._credits_used_lifetime_lock = threading.Lock()
         
-        self.start_date, self.end_date = config.get_billing_period()
-        logger.info(f"AWS Cost Explorer client initialized with region: {aws_region}")
+        # Generated reports as (generated_at, report) keyed by period, reused
+        # for memo_ttl_seconds so long-running callers see fresh data after that
+        self._report_cache = {}
     
-    def get_cost_by_service(self) -> Dict[str, float]:
+    def invalidate_cache(self) -> None:
+        """Drop in-process report and response caches so the next call re-fetches."""
+        self._report_cache.clear()
+        self._daily_by_service = None
+        self._monthly_by_record_type = None
+        self._credits_used_lifetime = None
+    
+    def refresh(self, include_usage_type: Optional[bool] = None) -> Dict[str, Any]:
         """
-        Get costs grouped by AWS service for the configured period.
+        Regenerate the billing report, ignoring in-process caches.
         
+        Responses still come from the on-disk cache while it is fresh; set
+        ``config.billing.cache_enabled = False`` to bypass it as well.
+        
+        Args:
+            include_usage_type: As for generate_billing_report
+            
         Returns:
-            Dict mapping service names to costs
+            Dictionary containing all billing data
         """
-        try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='DAILY',
-                Metrics=['UnblendedCost'],
-                GroupBy=[
-                    {'Type': 'DIMENSION', 'Key': 'SERVICE'}
-                ]
+        self.invalidate_cache()
+        return self.generate_billing_report(include_usage_type=include_usage_type)
+    
+    @property
+    def ce_client(self):
+        """
+        Cost Explorer client, created on first access.
+        
+        Analyzers with the same credentials and region share one client
+        (see _get_ce_client), so its connection pool is reused across them.
+        
+        Returns:
+            boto3 Cost Explorer client
+        """
+        if self._ce_client is None:
+            self._ce_client = _get_ce_client(
+                self._aws_access_key_id, self._aws_secret_access_key, self._aws_region
             )
+        return self._ce_client
+    
+    def _ce_pages(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every page of a Cost Explorer GetCostAndUsage response.
+        
+        GetCostAndUsage has no botocore paginator, so NextPageToken is
+        followed here. Pages are served from the on-disk cache when a copy
+        younger than ``config.billing.cache_max_age_hours`` exists, since
+        billing data only refreshes a few times a day.
+        
+        Args:
+            **kwargs: GetCostAndUsage request parameters
             
-            service_costs = {}
-            
-            for result in response['ResultsByTime']:
-                for group in result['Groups']:
-                    service_name = group['Keys'][0]
-                    cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                    
-                    if service_name not in service_costs:
-                        service_costs[service_name] = 0.0
-                    service_costs[service_name] += cost
-            
-            # Filter out services below threshold
-            filtered_costs = {
-                service: cost for service, cost in service_costs.items()
-                if cost >= config.billing.min_cost_threshold
+        Yields:
+            Response pages
+        """
+        cache_path = None
+        if config.billing.cache_enabled:
+            # Credentials and region are part of the key so switching accounts
+            # never serves another account's cached costs
+            key_material = {
+                'access_key_id': self._aws_access_key_id,
+                'region': self._aws_region,
+                'request': kwargs
             }
+            key = hashlib.blake2b(json.dumps(key_material, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+            cache_dir = os.path.expanduser(config.billing.cache_dir)
+            cache_path = os.path.join(cache_dir, f"{key}.json")
             
-            return filtered_costs
+            try:
+                if time.time() - os.path.getmtime(cache_path) < config.billing.cache_max_age_hours * 3600:
+                    with open(cache_path, 'rb') as f:
+                        pages = _json_loads(f.read())
+                    yield from pages
+                    return
+            except (OSError, ValueError):
+                pass  # Missing, unreadable or corrupt entry: fetch fresh
+        
+        pages = []
+        request = dict(kwargs)
+        
+        while True:
+            page = self.ce_client.get_cost_and_usage(**request)
+            page.pop('ResponseMetadata', None)
+            if cache_path:
+                pages.append(page)
+            yield page
+            
+            next_token = page.get('NextPageToken')
+            if not next_token:
+                break
+            request['NextPageToken'] = next_token
+        
+        if cache_path:
+            _write_cache_entry(cache_dir, cache_path, pages)
+    
+    def _fetch_daily_by_service(self) -> Dict[str, Any]:
+        """
+        Fetch daily costs grouped by service, once per analyzer.
+        
+        The same response backs both the per-service totals and the daily
+        cost series, so a report needs a single request for both. Pages are
+        folded into totals as they arrive.
+        
+        Returns:
+            Dict with unfiltered 'services' totals, 'daily' totals by date and 'unit'
+        """
+        with self._daily_by_service_lock:
+            if self._daily_by_service is None:
+                service_costs = defaultdict(float)
+                daily_costs = {}
+                unit = config.billing.currency
+                
+                pages = self._ce_pages(
+                    **self._ce_base_daily,
+                    GroupBy=[
+                        {'Type': 'DIMENSION', 'Key': 'SERVICE'}
+                    ]
+                )
+                
+                for result in _iter_results(pages):
+                    # A day's groups may be split across pages
+                    date = result['TimePeriod']['Start']
+                    day_cost = daily_costs.get(date, 0.0)
+                    
+                    for group in result.get('Groups', []):
+                        metric = group['Metrics']['UnblendedCost']
+                        cost = float(metric['Amount'])
+                        service_costs[group['Keys'][0]] += cost
+                        day_cost += cost
+                        unit = metric['Unit']
+                    
+                    daily_costs[date] = day_cost
+                
+                self._daily_by_service = {
+                    'services': dict(service_costs),
+                    'daily': daily_costs,
+                    'unit': unit
+                }
+        return self._daily_by_service
+    
+    def _fetch_monthly_by_record_type(self) -> Dict[str, float]:
+        """
+        Fetch period costs grouped by record type, once per analyzer.
+        
+        Usage, Credit, Refund, etc. all come back in the same response, so
+        total, usage, credit and net figures are derived from one request.
+        
+        Returns:
+            Dict mapping record types (e.g. 'Usage', 'Credit') to costs
+        """
+        with self._monthly_by_record_type_lock:
+            if self._monthly_by_record_type is None:
+                self._monthly_by_record_type = _sum_costs_by_key(self._ce_pages(
+                    **self._ce_base_monthly,
+                    GroupBy=[
+                        {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
+                    ]
+                ))
+        return self._monthly_by_record_type
+    
+    def get_cost_by_service(self) -> Dict[str, float]:
+        """
+        Get costs grouped by AWS service for the configured period.
+        
+        Returns:
+            Dict mapping service names to costs
+        """
+        try:
+            return _apply_cost_threshold(self._fetch_daily_by_service()['services'])
             
         except Exception as e:
-            logger.error(f"Error fetching AWS billing data: {e}")
+            logger.error("Error fetching AWS billing data: %s", e)
             return {}
     
     def get_cost_by_usage_type(self) -> Dict[str, float]:
         """
         Get costs grouped by usage type for more detailed analysis.
         
+        Only period totals are needed, so this uses MONTHLY granularity
+        rather than fetching and summing one row per day.
+        
         Returns:
             Dict mapping usage types to costs
         """
         try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='DAILY',
-                Metrics=['UnblendedCost'],
+            usage_costs = _sum_costs_by_key(self._ce_pages(
+                **self._ce_base_monthly,
                 GroupBy=[
                     {'Type': 'DIMENSION', 'Key': 'USAGE_TYPE'}
                 ]
-            )
+            ))
             
-            usage_costs = {}
+            return _apply_cost_threshold(usage_costs)
             
-            for result in response['ResultsByTime']:
-                for group in result['Groups']:
-                    usage_type = group['Keys'][0]
-                    cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                    
-                    if usage_type not in usage_costs:
-                        usage_costs[usage_type] = 0.0
-                    usage_costs[usage_type] += cost
+        except Exception as e:
+            logger.error("Error fetching AWS usage type data: %s", e)
+            return {}
+    
+    def get_daily_cost_series(self) -> Dict[str, Any]:
+        """
+        Get the daily cost breakdown as parallel columns.
+        
+        Consumers that only sum, average or zip the series can use this
+        directly instead of building one dict per day.
+        
+        Returns:
+            Dict with 'dates' and 'costs' lists of equal length and the cost 'unit'
+        """
+        try:
+            daily_by_service = self._fetch_daily_by_service()
+            daily_costs = daily_by_service['daily']
             
-            # Filter out usage types below threshold
-            filtered_costs = {
-                usage: cost for usage, cost in usage_costs.items()
-                if cost >= config.billing.min_cost_threshold
+            return {
+                'dates': list(daily_costs.keys()),
+                'costs': list(daily_costs.values()),
+                'unit': daily_by_service['unit']
             }
             
-            return filtered_costs
-            
         except Exception as e:
-            logger.error(f"Error fetching AWS usage type data: {e}")
-            return {}
+            logger.error("Error fetching daily cost data: %s", e)
+            return {'dates': [], 'costs': [], 'unit': config.billing.currency}
     
     def get_daily_costs(self) -> List[Dict[str, Any]]:
         """
@@ -135,33 +477,13 @@ class AWSBillingAnalyzer:
         Returns:
             List of daily cost data
         """
-        try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='DAILY',
-                Metrics=['UnblendedCost']
-            )
-            
-            daily_costs = []
-            
-            for result in response['ResultsByTime']:
-                date = result['TimePeriod']['Start']
-                cost = float(result['Total']['UnblendedCost']['Amount'])
-                
-                daily_costs.append({
-                    'date': date,
-                    'cost': cost,
-                    'unit': result['Total']['UnblendedCost']['Unit']
-                })
-            
-            return daily_costs
-            
-        except Exception as e:
-            logger.error(f"Error fetching daily cost data: {e}")
-            return []
+        series = self.get_daily_cost_series()
+        unit = series['unit']
+        
+        return [
+            {'date': date, 'cost': cost, 'unit': unit}
+            for date, cost in zip(series['dates'], series['costs'])
+        ]
     
     def get_total_cost(self) -> float:
         """
@@ -171,20 +493,10 @@ class AWSBillingAnalyzer:
             Total cost as float
         """
         try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['UnblendedCost']
-            )
-            
-            total_cost = float(response['ResultsByTime'][0]['Total']['UnblendedCost']['Amount'])
-            return total_cost
+            return sum(self._fetch_monthly_by_record_type().values())
             
         except Exception as e:
-            logger.error(f"Error fetching total cost: {e}")
+            logger.error("Error fetching total cost: %s", e)
             return 0.0
     
     def get_credits(self) -> float:
@@ -195,31 +507,10 @@ class AWSBillingAnalyzer:
             Total credits as float (negative value)
         """
         try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['UnblendedCost'],
-                GroupBy=[
-                    {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
-                ]
-            )
-            
-            total_credits = 0.0
-            
-            for result in response['ResultsByTime']:
-                for group in result.get('Groups', []):
-                    record_type = group['Keys'][0]
-                    if record_type == 'Credit':
-                        cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                        total_credits += cost  # Credits are already negative
-            
-            return total_credits
+            return self._fetch_monthly_by_record_type().get('Credit', 0.0)  # Credits are already negative
             
         except Exception as e:
-            logger.error(f"Error fetching credits: {e}")
+            logger.error("Error fetching credits: %s", e)
             return 0.0
     
     def get_usage_cost(self) -> float:
@@ -230,83 +521,78 @@ class AWSBillingAnalyzer:
             Usage cost as float
         """
         try:
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': self.start_date.strftime('%Y-%m-%d'),
-                    'End': self.end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['UnblendedCost'],
-                GroupBy=[
-                    {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
-                ]
-            )
-            
-            total_usage = 0.0
-            
-            for result in response['ResultsByTime']:
-                for group in result.get('Groups', []):
-                    record_type = group['Keys'][0]
-                    if record_type == 'Usage':
-                        cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                        total_usage += cost
-            
-            return total_usage
+            return self._fetch_monthly_by_record_type().get('Usage', 0.0)
             
         except Exception as e:
-            logger.error(f"Error fetching usage cost: {e}")
+            logger.error("Error fetching usage cost: %s", e)
             return 0.0
     
-    def get_credits_used_lifetime(self) -> float:
+    def get_credits_used_lifetime(self, raise_errors: bool = False) -> float:
         """
         Get total credits used from account creation until now.
         This calculates cumulative credit usage to determine remaining balance.
+        The result is reused for ``config.billing.memo_ttl_seconds``.
+        
+        Args:
+            raise_errors: Propagate lookup failures instead of logging them
+                and returning 0.0
         
         Returns:
             Total credits used (positive value)
         """
-        try:
-            # Get data from maximum safe lookback (400 days = ~13.3 months)
-            # This is the maximum we can reliably access via Cost Explorer API
-            current_date = datetime.now()
-            account_start = current_date - timedelta(days=400)
-            
-            response = self.ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': account_start.strftime('%Y-%m-%d'),
-                    'End': current_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=['UnblendedCost'],
-                GroupBy=[
-                    {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
-                ]
-            )
-            
-            total_credits_used = 0.0
-            
-            for result in response['ResultsByTime']:
-                for group in result.get('Groups', []):
-                    record_type = group['Keys'][0]
-                    if record_type == 'Credit':
-                        cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                        total_credits_used += abs(cost)  # Convert to positive
+        with self._credits_used_lifetime_lock:
+            cached = self._credits_used_lifetime
+            if cached is not None and time.monotonic() - cached[0] < config.billing.memo_ttl_seconds:
+                return cached[1]
             
-            return total_credits_used
-            
-        except Exception as e:
-            logger.error(f"Error fetching lifetime credit usage: {e}")
-            return 0.0
+            try:
+                # Get data from maximum safe lookback (400 days = ~13.3 months)
+                # This is the maximum we can reliably access via Cost Explorer API.
+                # Whole days keep the request (and its cache key) stable all day.
+                current_date = date.today()
+                account_start = current_date - timedelta(days=400)
+                
+                pages = self._ce_pages(
+                    **{
+                        **self._ce_base_monthly,
+                        'TimePeriod': {
+                            'Start': account_start.isoformat(),
+                            'End': current_date.isoformat()
+                        }
+                    },
+                    # Only credits are needed, so filter server-side and read totals
+                    Filter={
+                        'Dimensions': {'Key': 'RECORD_TYPE', 'Values': ['Credit']}
+                    }
+                )
+                
+                # Convert to positive
+                total_credits_used = sum(
+                    abs(float(result['Total']['UnblendedCost']['Amount']))
+                    for result in _iter_results(pages)
+                )
+                
+                self._credits_used_lifetime = (time.monotonic(), total_credits_used)
+                return total_credits_used
+                
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error("Error fetching lifetime credit usage: %s", e)
+                return 0.0
     
-    def get_remaining_credits(self) -> float:
+    def get_remaining_credits(self, raise_errors: bool = False) -> float:
         """
         Calculate remaining credits based on total credits and actual usage from AWS.
         
+        Args:
+            raise_errors: As for get_credits_used_lifetime
+        
         Returns:
             Remaining credits as float
         """
         total_credits = config.billing.total_credits
-        credits_used = self.get_credits_used_lifetime()
+        credits_used = self.get_credits_used_lifetime(raise_errors=raise_errors)
         remaining = total_credits - credits_used
         return max(0.0, remaining)  # Ensure non-negative
     
@@ -321,31 +607,74 @@ class AWSBillingAnalyzer:
         credits = self.get_credits()
         return usage_cost + credits  # credits are negative, so this subtracts them
     
-    def generate_billing_report(self) -> Dict[str, Any]:
+    def generate_billing_report(self, include_usage_type: Optional[bool] = None) -> Dict[str, Any]:
         """
         Generate a comprehensive billing report.
         
+        Reports are memoized per period for ``config.billing.memo_ttl_seconds``;
+        call refresh() to force a new one sooner.
+        
+        Args:
+            include_usage_type: Fetch the per-usage-type breakdown. Defaults to
+                config.billing.include_usage_type_breakdown; when off,
+                'costs_by_usage_type' is empty.
+        
         Returns:
             Dictionary containing all billing data
         """
-        logger.info(f"Generating billing report for period: {self.start_date.date()} to {self.end_date.date()}")
+        if include_usage_type is None:
+            include_usage_type = config.billing.include_usage_type_breakdown
         
-        # Get all cost and credit data
-        usage_cost = self.get_usage_cost()
+        cache_key = (
+            self._start_str, self._end_str,
+            self.period_type, self.period_count,
+            include_usage_type
+        )
+        cached = self._report_cache.get(cache_key)
+        if cached is not None:
+            if time.monotonic() - cached[0] < config.billing.memo_ttl_seconds:
+                return cached[1]
+            # Expired: the responses behind it are just as stale
+            self.invalidate_cache()
+        
+        logger.info("Generating billing report for period: %s to %s", self.start_date.date(), self.end_date.date())
+        
+        # Cost Explorer requests are independent, so issue them concurrently.
+        # The shared client is thread-safe; each getter handles its own errors.
+        tasks = {
+            'costs_by_service': self.get_cost_by_service,
+            'usage_cost': self.get_usage_cost,
+            'credits_used_lifetime': self.get_credits_used_lifetime,
+        }
+        if include_usage_type:
+            tasks['costs_by_usage_type'] = self.get_cost_by_usage_type
+        results = {}
+        
+        with ThreadPoolExecutor(max_workers=config.billing.ce_max_workers) as executor:
+            futures = {executor.submit(task): name for name, task in tasks.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error("Error fetching %s: %s", name, e)
+        
+        # These read the responses fetched above
+        usage_cost = results.get('usage_cost', 0.0)
         credits_applied = self.get_credits()  # negative value
-        net_cost = self.get_net_cost()
+        net_cost = usage_cost + credits_applied
         
         # Get lifetime credit data
         total_credits_available = config.billing.total_credits
-        credits_used_lifetime = self.get_credits_used_lifetime()
-        remaining_credits = self.get_remaining_credits()
+        credits_used_lifetime = results.get('credits_used_lifetime', 0.0)
+        remaining_credits = max(0.0, total_credits_available - credits_used_lifetime)
         
         report = {
             'period': {
-                'start_date': self.start_date.strftime('%Y-%m-%d'),
-                'end_date': self.end_date.strftime('%Y-%m-%d'),
-                'period_type': config.billing.period_type,
-                'period_count': config.billing.period_count
+                'start_date': self._start_str,
+                'end_date': self._end_str,
+                'period_type': self.period_type,
+                'period_count': self.period_count
             },
             'costs': {
                 'usage_cost_period': usage_cost,  # Actual usage for this period
@@ -360,15 +689,17 @@ class AWSBillingAnalyzer:
                 'applied_this_period': abs(credits_applied),
                 'expiration_date': config.billing.credit_expiration
             },
-            # Legacy fields for backward compatibility
+            # Legacy fields for backward compatibility. The signed period credit
+            # total is -costs['credits_applied_period']; a second 'credits' key
+            # here would replace the credits section above.
             'total_cost': usage_cost,
-            'credits': credits_applied,  # negative value
             'net_cost': net_cost,
             'currency': config.billing.currency,
-            'costs_by_service': self.get_cost_by_service(),
-            'costs_by_usage_type': self.get_cost_by_usage_type(),
+            'costs_by_service': results.get('costs_by_service', {}),
+            'costs_by_usage_type': results.get('costs_by_usage_type', {}),
             'daily_costs': self.get_daily_costs(),
             'generated_at': datetime.now().isoformat()
         }
         
+        self._report_cache[cache_key] = (time.monotonic(), report)
         return report
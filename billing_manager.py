@@ -1,42 +1,178 @@
 """
 Main billing manager that orchestrates AWS billing analysis and integrations.
 """
+import argparse
+import atexit
+import bisect
 import os
+import sys
 import logging
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 
-from aws_billing import AWSBillingAnalyzer
-from integrations.slack_integration import SlackIntegration
 from config import config
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    from aws_billing import AWSBillingAnalyzer
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Remaining-credit thresholds (ascending) and the status for each band;
+# a balance above _CREDIT_THRESHOLDS[i - 1] and at most _CREDIT_THRESHOLDS[i]
+# gets _CREDIT_STATUSES[i]
+_CREDIT_THRESHOLDS = (0, 500, 1000)
+_CREDIT_STATUSES = (
+    "❌ EXHAUSTED - No credits remaining!",
+    "🚨 CRITICAL - Credits running out soon!",
+    "⚠️  MONITOR - Credits getting low",
+    "✅ HEALTHY - Credits are sufficient",
+)
+
+
+# Worker pool for background notifications, shared by every BillingManager
+# and created on the first background send
+_NOTIFY_MAX_WORKERS = 4
+_notify_executor: Optional[ThreadPoolExecutor] = None
+_notify_executor_lock = threading.Lock()
+
+
+def _get_notify_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared notification worker pool, creating it on first use.
+    
+    Its shutdown is registered with atexit once, so pending sends finish
+    before the process exits.
+    
+    Returns:
+        Shared ThreadPoolExecutor
+    """
+    global _notify_executor
+    with _notify_executor_lock:
+        if _notify_executor is None:
+            _notify_executor = ThreadPoolExecutor(
+                max_workers=_NOTIFY_MAX_WORKERS,
+                thread_name_prefix='notify'
+            )
+            atexit.register(_notify_executor.shutdown, wait=True)
+        return _notify_executor
+
+
+@lru_cache(maxsize=8)
+def _period_heading(period_type: str, period_count: int,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None) -> tuple:
+    """
+    Build the report title line and period length for a billing period.
+    
+    Periods rarely change between renders, so each combination is
+    formatted once.
+    
+    Args:
+        period_type: 'd' for days, 'm' for months
+        period_count: Number of periods covered
+        start_date: Period start as YYYY-MM-DD
+        end_date: Period end (exclusive) as YYYY-MM-DD
+        
+    Returns:
+        tuple: (title line, length in days)
+    """
+    period_unit = 'month' if period_type == 'm' else 'day'
+    period_text = f"{period_unit}{'s' if period_count > 1 else ''}"
+    if start_date and end_date:
+        # Month periods run to date, so use the days actually covered
+        period_days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days
+    else:
+        period_days = period_count * (30 if period_type == 'm' else 1)
+    return f"     AWS BILLING REPORT - {period_count} {period_text.upper()}", period_days
+
+
+@dataclass(frozen=True)
+class Env:
+    """Snapshot of the environment variables the billing manager reads."""
+    
+    aws_access_key_id: Optional[str] = None
+    aws_secret_access_key: Optional[str] = field(default=None, repr=False)
+    aws_region: str = 'us-east-1'
+    slack_webhook_url: Optional[str] = None
+    
+    @classmethod
+    def from_environ(cls) -> 'Env':
+        """
+        Read the environment once.
+        
+        Returns:
+            Env populated from os.environ
+        """
+        return cls(
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            aws_region=os.getenv('AWS_REGION', 'us-east-1'),
+            slack_webhook_url=os.getenv('SLACK_WEBHOOK_URL')
+        )
+
+
+@lru_cache(maxsize=None)
+def get_env() -> Env:
+    """
+    Load .env on first use and snapshot the environment.
+    
+    Returns:
+        Env shared by every BillingManager in the process
+    """
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    return Env.from_environ()
+
 
 class BillingManager:
     """Main class for managing billing analysis and notifications."""
     
-    def __init__(self):
-        """Initialize the billing manager."""
-        self.aws_analyzer = AWSBillingAnalyzer()
+    def __init__(self, background_notifications: bool = True, env: Optional[Env] = None,
+                 aws_analyzer: Optional['AWSBillingAnalyzer'] = None):
+        """
+        Initialize the billing manager.
+        
+        Args:
+            background_notifications: Send notifications on a worker thread so
+                callers get the report without waiting on webhooks. Pending
+                sends are completed before the process exits.
+            env: Environment snapshot to use instead of get_env()
+            aws_analyzer: Existing AWSBillingAnalyzer to share, so its cached
+                responses are reused; a new one is created if omitted
+        """
+        # boto3 is heavy to import, so defer it until a manager is built
+        from aws_billing import AWSBillingAnalyzer
+        
+        self.env = env or get_env()
+        self.aws_analyzer = aws_analyzer or AWSBillingAnalyzer()
         self.slack_integration = None
         
+        # Every enabled integration; each exposes send_billing_report(report)
+        self.integrations: List[Any] = []
+        
         # Initialize Slack integration if enabled
         if config.integrations.slack_enabled:
-            webhook_url = os.getenv('SLACK_WEBHOOK_URL')
+            webhook_url = self.env.slack_webhook_url
             if webhook_url:
-                self.slack_integration = SlackIntegration(webhook_url)
+                from integrations.slack_integration import SlackIntegration
+                
+                self.slack_integration = SlackIntegration(webhook_url, analyzer=self.aws_analyzer)
+                self.integrations.append(self.slack_integration)
                 logger.info("Slack integration initialized")
             else:
                 logger.warning("Slack webhook URL not found in environment variables")
+        
+        # Future integrations can be added here
+        # if config.integrations.email_enabled:
+        #     self.integrations.append(EmailIntegration(...))
+        
+        # The worker pool is shared and only created by the first background send
+        self.background_notifications = background_notifications
+        self._pending_notifications: List[Future] = []
     
     def generate_and_display_report(self) -> Dict[str, Any]:
         """
@@ -48,12 +184,16 @@ class BillingManager:
         logger.info("Generating billing report...")
         
         try:
-            report = self.aws_analyzer.generate_billing_report()
+            # The usage-type breakdown is the costliest query; only fetch it when wanted
+            include_usage_type = config.billing.include_usage_type_breakdown or (
+                self.slack_integration is not None and config.integrations.slack_detailed
+            )
+            report = self.aws_analyzer.generate_billing_report(include_usage_type=include_usage_type)
             self._display_report_console(report)
             return report
             
         except Exception as e:
-            logger.error(f"Error generating billing report: {e}")
+            logger.error("Error generating billing report: %s", e)
             return {}
     
     def _display_report_console(self, report: Dict[str, Any]) -> None:
@@ -63,53 +203,56 @@ class BillingManager:
         Args:
             report: Billing report data
         """
-        period = report.get('period', {})
+        period = report.get('period') or {}
         costs = report.get('costs', {})
         credits = report.get('credits', {})
         currency = report.get('currency', 'USD')
         
-        # Determine period type for display
-        period_type = period.get('period_type', 'd')
-        period_count = period.get('period_count', 1)
-        
-        if period_type == 'm':
-            period_text = f"month{'s' if period_count > 1 else ''}"
-        else:
-            period_text = f"day{'s' if period_count > 1 else ''}"
-        
-        print("\n" + "=" * 60)
-        print(f"     AWS BILLING REPORT - {period_count} {period_text.upper()}")
-        print("=" * 60)
+        # Unpack period details once for display
+        start_date = period.get('start_date')
+        end_date = period.get('end_date')
+        title, period_days = _period_heading(
+            period.get('period_type', 'd'), period.get('period_count', 1), start_date, end_date
+        )
         
-        # Period information
-        print(f"Period: {period.get('start_date')} to {period.get('end_date')}")
-        print()
+        # Build the whole report and write it in one go
+        lines: List[str] = [
+            "",
+            "=" * 60,
+            title,
+            "=" * 60,
+            # Period information
+            f"Period: {start_date} to {end_date}",
+            "",
+        ]
         
-        # Credit Overview - get accurate remaining credits
-        total_credits = 5000
-        expiration = 'Unknown'
-        
-        # Get fresh credit calculations from AWS
-        try:
+        # Credit Overview - the report already carries the lifetime figures
+        if isinstance(credits, dict):
+            total_credits = credits.get('total_available', config.billing.total_credits)
+            used_lifetime = credits.get('used_lifetime', 0)
+            remaining_credits = credits.get('remaining', max(0, total_credits - used_lifetime))
+            expiration = credits.get('expiration_date', 'Unknown')
+        else:
+            # Legacy format has no lifetime data; the analyzer memoizes these
+            total_credits = config.billing.total_credits
             used_lifetime = self.aws_analyzer.get_credits_used_lifetime()
             remaining_credits = self.aws_analyzer.get_remaining_credits()
-        except:
-            # Fallback values
-            used_lifetime = 0
-            remaining_credits = total_credits
+            expiration = config.billing.credit_expiration
         
-        print("💳 CREDIT OVERVIEW:")
-        print(f"   Total Credits Available: {currency} {total_credits:.2f}")
-        print(f"   Credits Used (Lifetime): {currency} {used_lifetime:.2f}")
-        print(f"   Credits Remaining:       {currency} {remaining_credits:.2f}")
-        print(f"   Credit Expiration:       {expiration}")
+        lines += [
+            "💳 CREDIT OVERVIEW:",
+            f"   Total Credits Available: {currency} {total_credits:.2f}",
+            f"   Credits Used (Lifetime): {currency} {used_lifetime:.2f}",
+            f"   Credits Remaining:       {currency} {remaining_credits:.2f}",
+            f"   Credit Expiration:       {expiration}",
+        ]
         
         # Calculate percentage used
         if total_credits > 0:
             percent_used = (used_lifetime / total_credits) * 100
             percent_remaining = 100 - percent_used
-            print(f"   Usage Percentage:        {percent_used:.1f}% used, {percent_remaining:.1f}% remaining")
-        print()
+            lines.append(f"   Usage Percentage:        {percent_used:.1f}% used, {percent_remaining:.1f}% remaining")
+        lines.append("")
         
         # Current Period Costs - handle both dict and legacy formats
         if isinstance(costs, dict):
@@ -125,63 +268,104 @@ class BillingManager:
         else:
             credits_applied = abs(credits) if credits < 0 else 0
         
-        print("📊 CURRENT PERIOD COSTS:")
-        print(f"   Actual Usage Cost:       {currency} {usage_cost:.2f}")
-        print(f"   Credits Applied:         {currency} {credits_applied:.2f}")
-        print(f"   Net Cost (You Pay):      {currency} {max(0, net_cost):.2f}")
-        print()
+        lines += [
+            "📊 CURRENT PERIOD COSTS:",
+            f"   Actual Usage Cost:       {currency} {usage_cost:.2f}",
+            f"   Credits Applied:         {currency} {credits_applied:.2f}",
+            f"   Net Cost (You Pay):      {currency} {max(0, net_cost):.2f}",
+            "",
+        ]
         
         # Credit burn rate estimation
-        if period_count > 0 and credits_applied > 0:
-            monthly_burn_rate = credits_applied * (30 / (period_count * (30 if period_type == 'm' else 1)))
+        if period_days > 0 and credits_applied > 0:
+            monthly_burn_rate = credits_applied * 30 / period_days
             if monthly_burn_rate > 0 and remaining_credits > 0:
                 months_remaining = remaining_credits / monthly_burn_rate
-                print("⏱️  CREDIT BURN RATE ANALYSIS:")
-                print(f"   Estimated Monthly Burn:  {currency} {monthly_burn_rate:.2f}")
-                print(f"   Est. Months Remaining:   {months_remaining:.1f} months")
-                print()
+                lines += [
+                    "⏱️  CREDIT BURN RATE ANALYSIS:",
+                    f"   Estimated Monthly Burn:  {currency} {monthly_burn_rate:.2f}",
+                    f"   Est. Months Remaining:   {months_remaining:.1f} months",
+                    "",
+                ]
         
         # Status indicators
-        if remaining_credits > 1000:
-            status = "✅ HEALTHY - Credits are sufficient"
-        elif remaining_credits > 500:
-            status = "⚠️  MONITOR - Credits getting low"
-        elif remaining_credits > 0:
-            status = "🚨 CRITICAL - Credits running out soon!"
-        else:
-            status = "❌ EXHAUSTED - No credits remaining!"
+        status = _CREDIT_STATUSES[bisect.bisect_left(_CREDIT_THRESHOLDS, remaining_credits)]
         
-        print(f"Status: {status}")
-        print("=" * 60)
+        lines += [
+            f"Status: {status}",
+            "=" * 60,
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
     
-    def send_notifications(self, report: Dict[str, Any]) -> None:
+    def send_notifications(self, report: Dict[str, Any],
+                           alerts: Optional[List[Dict[str, Any]]] = None) -> None:
         """
         Send billing report to all configured integrations.
         
         Args:
             report: Billing report data
+            alerts: Optional alerts ('title', 'message', 'color') to send with the report
         """
         logger.info("Sending notifications...")
         
-        # Send to Slack if configured
-        if self.slack_integration:
-            try:
-                success = self.slack_integration.send_billing_report(report)
-                if success:
-                    logger.info("Billing report sent to Slack successfully")
-                else:
-                    logger.error("Failed to send billing report to Slack")
-            except Exception as e:
-                logger.error(f"Error sending to Slack: {e}")
+        if not self.integrations:
+            return
         
-        # Future integrations can be added here
-        # if config.integrations.email_enabled:
-        #     # Send email notification
-        #     pass
+        # Webhook sends are independent I/O, so dispatch them concurrently
+        if self.background_notifications:
+            executor = _get_notify_executor()
+            for integration in self.integrations:
+                self._pending_notifications.append(
+                    executor.submit(self._send_to_integration, integration, report, alerts)
+                )
+        else:
+            with ThreadPoolExecutor(max_workers=len(self.integrations)) as executor:
+                futures = [
+                    executor.submit(self._send_to_integration, integration, report, alerts)
+                    for integration in self.integrations
+                ]
+                for future in as_completed(futures):
+                    future.result()
+    
+    @staticmethod
+    def _send_to_integration(integration: Any, report: Dict[str, Any],
+                             alerts: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Send billing report to one integration and log the outcome.
+        
+        Args:
+            integration: Integration exposing send_billing_report(report)
+            report: Billing report data
+            alerts: Optional alerts to bundle with the report
+        """
+        name = type(integration).__name__
+        try:
+            # Integrations that can bundle alerts send everything in one request
+            if alerts and hasattr(integration, 'send_combined'):
+                success = integration.send_combined(report, alerts)
+            else:
+                success = integration.send_billing_report(report)
+                for alert in alerts or ():
+                    success = integration.send_alert(
+                        alert['title'], alert['message'], alert.get('color', 'warning')
+                    ) and success
+            if success:
+                logger.info("Billing report sent via %s successfully", name)
+            else:
+                logger.error("Failed to send billing report via %s", name)
+        except Exception as e:
+            logger.error("Error sending via %s: %s", name, e)
+    
+    def wait_for_notifications(self, timeout: Optional[float] = None) -> None:
+        """
+        Block until notifications sent in the background have finished.
         
-        # if config.integrations.teams_enabled:
-        #     # Send Teams notification
-        #     pass
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        """
+        if self._pending_notifications:
+            wait(self._pending_notifications, timeout=timeout)
+            self._pending_notifications = [f for f in self._pending_notifications if not f.done()]
     
     def run_billing_analysis(self, send_notifications: bool = True) -> Dict[str, Any]:
         """
@@ -209,38 +393,60 @@ class BillingManager:
         logger.info("Billing analysis completed")
         return report
     
-    def check_aws_credentials(self) -> bool:
+    @staticmethod
+    def check_aws_credentials(env: Optional[Env] = None) -> bool:
         """
         Check if AWS credentials are properly configured in .env file.
         
+        Args:
+            env: Environment snapshot to check instead of get_env()
+        
         Returns:
             True if credentials are available, False otherwise
         """
-        required_vars = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY']
+        env = env or get_env()
+        required_vars = {
+            'AWS_ACCESS_KEY_ID': env.aws_access_key_id,
+            'AWS_SECRET_ACCESS_KEY': env.aws_secret_access_key
+        }
         
-        for var in required_vars:
-            if not os.getenv(var):
-                logger.error(f"Missing required environment variable in .env file: {var}")
+        for var, value in required_vars.items():
+            if not value:
+                logger.error("Missing required environment variable in .env file: %s", var)
                 return False
         
-        aws_region = os.getenv('AWS_REGION', 'us-east-1')
-        logger.info(f"AWS credentials found in .env file (region: {aws_region})")
+        logger.info("AWS credentials found in .env file (region: %s)", env.aws_region)
         return True
 
 
 def main():
     """Main function to run the billing analysis."""
-    billing_manager = BillingManager()
+    # Configure logging for CLI runs only, leaving importers in control
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
     
-    # Check AWS credentials
-    if not billing_manager.check_aws_credentials():
+    parser = argparse.ArgumentParser(description="AWS billing analysis and notifications")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Bypass the on-disk Cost Explorer response cache")
+    args = parser.parse_args()
+    
+    if args.no_cache:
+        config.billing.cache_enabled = False
+    
+    # Check AWS credentials before building any clients
+    if not BillingManager.check_aws_credentials():
         print("ERROR: AWS credentials not found in .env file.")
         print("Please ensure AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY are set in .env")
         return
     
+    billing_manager = BillingManager()
+    
     # Run billing analysis
     # Enable notifications if Slack webhook is configured
-    send_notifications = bool(os.getenv('SLACK_WEBHOOK_URL'))
+    send_notifications = bool(get_env().slack_webhook_url)
     report = billing_manager.run_billing_analysis(send_notifications=send_notifications)
     
     if report:
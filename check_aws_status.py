@@ -3,25 +3,47 @@
 Simple script to check AWS account status and understand billing.
 """
 import os
-import subprocess
 import sys
 
+_ZERO_CHARGE_REASONS = (
+    "1. 🆓 AWS Free Tier Active - New accounts get 12 months free",
+    "2. 🚫 No Active Services - No EC2, S3, Lambda, etc. running",
+    "3. 💳 Credits Covering Charges - Your $146.26 credit covers everything",
+    "4. ⏰ Timing - Current month charges not yet processed",
+    "5. 🧪 Test Account - Minimal or no usage of paid services",
+    "6. 🎯 Free Tier Limits - Staying within free service limits"
+)
+
+_INVESTIGATION_STEPS = (
+    "1. Check AWS Console Billing Dashboard",
+    "2. Look at Cost Explorer in AWS Console",
+    "3. Check if you have any running services",
+    "4. Review your AWS Free Tier usage",
+    "5. Check if you're in a new account period",
+    "6. Look at your credit sources in AWS Console"
+)
+
 def check_aws_cli():
-    """Check if AWS CLI is available and configured."""
+    """Check if AWS credentials resolve to a working identity."""
     try:
-        result = subprocess.run(['aws', 'sts', 'get-caller-identity'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            print("✅ AWS CLI is configured and working")
-            return True
-        else:
-            print("❌ AWS CLI error:", result.stderr)
-            return False
-    except FileNotFoundError:
-        print("❌ AWS CLI not found. Install it first.")
+        import boto3
+        from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+    except ImportError:
+        print("❌ boto3 not found. Install it first.")
+        return False
+
+    try:
+        boto3.client('sts').get_caller_identity()
+        print("✅ AWS credentials are configured and working")
+        return True
+    except NoCredentialsError:
+        print("❌ AWS credentials not found")
+        return False
+    except ClientError as e:
+        print("❌ AWS STS error:", e.response.get('Error', {}).get('Message', e))
         return False
-    except Exception as e:
-        print(f"❌ Error checking AWS CLI: {e}")
+    except BotoCoreError as e:
+        print(f"❌ Error checking AWS credentials: {e}")
         return False
 
 def check_environment_variables():
@@ -36,7 +58,7 @@ def check_environment_variables():
     for var in required_vars:
         value = os.getenv(var)
         if value:
-            print(f"✅ {var}: {'*' * len(value)} (configured)")
+            print(f"✅ {var}: ******** (configured)")
         else:
             print(f"❌ {var}: Not configured")
             all_good = False
@@ -44,7 +66,7 @@ def check_environment_variables():
     for var in optional_vars:
         value = os.getenv(var)
         if value:
-            print(f"✅ {var}: {'*' * len(value)} (configured)")
+            print(f"✅ {var}: ******** (configured)")
         else:
             print(f"⚠️  {var}: Not configured (optional)")
     
@@ -52,44 +74,24 @@ def check_environment_variables():
 
 def explain_zero_charges():
     """Explain possible reasons for zero charges."""
-    print("\n🤔 Why might your charges be $0.00?")
-    print("-" * 40)
-    
-    reasons = [
-        "1. 🆓 AWS Free Tier Active - New accounts get 12 months free",
-        "2. 🚫 No Active Services - No EC2, S3, Lambda, etc. running",
-        "3. 💳 Credits Covering Charges - Your $146.26 credit covers everything",
-        "4. ⏰ Timing - Current month charges not yet processed",
-        "5. 🧪 Test Account - Minimal or no usage of paid services",
-        "6. 🎯 Free Tier Limits - Staying within free service limits"
-    ]
-    
-    for reason in reasons:
-        print(f"   {reason}")
+    sys.stdout.write(
+        "\n🤔 Why might your charges be $0.00?\n" + "-" * 40 + "\n   "
+        + "\n   ".join(_ZERO_CHARGE_REASONS) + "\n"
+    )
 
 def suggest_investigation():
     """Suggest ways to investigate further."""
-    print("\n🔍 How to investigate further:")
-    print("-" * 40)
-    
-    suggestions = [
-        "1. Check AWS Console Billing Dashboard",
-        "2. Look at Cost Explorer in AWS Console",
-        "3. Check if you have any running services",
-        "4. Review your AWS Free Tier usage",
-        "5. Check if you're in a new account period",
-        "6. Look at your credit sources in AWS Console"
-    ]
-    
-    for suggestion in suggestions:
-        print(f"   {suggestion}")
+    sys.stdout.write(
+        "\n🔍 How to investigate further:\n" + "-" * 40 + "\n   "
+        + "\n   ".join(_INVESTIGATION_STEPS) + "\n"
+    )
 
 def main():
     """Main function to check AWS status."""
     print("AWS Account Status Check")
     print("=" * 50)
     
-    # Check AWS CLI
+    # Check AWS credentials
     aws_working = check_aws_cli()
     
     # Check environment variables
@@ -1,12 +1,14 @@
 """
 Configuration settings for the billing project.
 """
-from pydantic import BaseModel
-from typing import List, Literal
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional
 from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
 
 
-class BillingConfig(BaseModel):
+@dataclass(slots=True)
+class BillingConfig:
     """Configuration for billing period and settings."""
     
     # Billing period: 'd' for days, 'm' for months
@@ -29,45 +31,74 @@ class BillingConfig(BaseModel):
     
     # Credit expiration date (if known)
     credit_expiration: str = '2026-12-31'  # Format: YYYY-MM-DD
+    
+    # Include the per-usage-type breakdown in reports (the widest, slowest query)
+    include_usage_type_breakdown: bool = False
+    
+    # Concurrent Cost Explorer requests per report (keep <= 10 to avoid throttling)
+    ce_max_workers: int = 5
+    
+    # How long in-process reports and credit totals are reused before re-querying (seconds)
+    memo_ttl_seconds: float = 60.0
+    
+    # On-disk Cost Explorer response cache (billing data refreshes ~3x daily)
+    cache_enabled: bool = True
+    cache_dir: str = '~/.cache/billing-manager'
+    cache_max_age_hours: float = 8.0
 
 
-class IntegrationConfig(BaseModel):
+@dataclass(slots=True)
+class IntegrationConfig:
     """Configuration for different integrations."""
     
     # Currently supported integrations
-    integrations: List[str] = ['slack']
+    integrations: List[str] = field(default_factory=lambda: ['slack'])
     
     # Slack specific settings
     slack_enabled: bool = True
     slack_channel: str = '#billing-alerts'
     
+    # Request the detailed report (with usage-type breakdown) for Slack
+    slack_detailed: bool = False
+    
     # Future integrations can be added here
     # email_enabled: bool = False
     # teams_enabled: bool = False
 
 
-class Config(BaseModel):
+@dataclass(slots=True)
+class Config:
     """Main configuration class."""
     
-    billing: BillingConfig = BillingConfig()
-    integrations: IntegrationConfig = IntegrationConfig()
+    billing: BillingConfig = field(default_factory=BillingConfig)
+    integrations: IntegrationConfig = field(default_factory=IntegrationConfig)
     
-    def get_billing_period(self) -> tuple[datetime, datetime]:
+    def get_billing_period(self, period_type: Optional[str] = None,
+                           period_count: Optional[int] = None) -> tuple[datetime, datetime]:
         """
         Calculate the billing period start and end dates.
         
+        Args:
+            period_type: 'd' or 'm'; defaults to billing.period_type
+            period_count: Number of periods; defaults to billing.period_count
+        
         Returns:
             tuple: (start_date, end_date) for the billing period
         """
+        period_type = period_type or self.billing.period_type
+        period_count = period_count or self.billing.period_count
         end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         
-        if self.billing.period_type == 'd':
-            start_date = end_date - timedelta(days=self.billing.period_count)
-        elif self.billing.period_type == 'm':
-            # Approximate month calculation
-            start_date = end_date - timedelta(days=self.billing.period_count * 30)
+        if period_type == 'd':
+            start_date = end_date - timedelta(days=period_count)
+        elif period_type == 'm':
+            # Calendar months: the month containing the last billed day (yesterday)
+            # plus the previous (count - 1) months, so Cost Explorer's MONTHLY
+            # buckets align with the period
+            last_billed_day = end_date - timedelta(days=1)
+            start_date = last_billed_day.replace(day=1) - relativedelta(months=period_count - 1)
         else:
-            raise ValueError(f"Unsupported period type: {self.billing.period_type}")
+            raise ValueError(f"Unsupported period type: {period_type}")
         
         return start_date, end_date
 
@@ -6,13 +6,100 @@ This script provides detailed analysis of AWS credit usage, remaining balance,
 and burn rate projections for the neelcamp profile with $5,000 in credits.
 """
 
+import argparse
+import calendar
+import heapq
+import io
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+from dateutil.relativedelta import relativedelta
 from config import config
 from aws_billing import AWSBillingAnalyzer
 from billing_manager import BillingManager
 
+# Optimization tips for the services worth specific advice, keyed by a
+# substring of the Cost Explorer service name
+SERVICE_TIPS = {
+    "Elastic Compute Cloud": (
+        "• Consider rightsizing EC2 instances",
+        "• Use Spot Instances for non-critical workloads",
+        "• Enable EC2 Instance Savings Plans",
+    ),
+    "Relational Database Service": (
+        "• Review RDS instance sizes and types",
+        "• Consider Aurora Serverless for variable workloads",
+        "• Enable automated backups optimization",
+    ),
+    "ElastiCache": (
+        "• Review cache instance sizes",
+        "• Consider Redis vs Memcached based on use case",
+        "• Monitor cache hit ratios",
+    ),
+}
+DEFAULT_TIPS = (
+    "• Review usage patterns for cost optimization",
+    "• Consider AWS Cost Optimization recommendations",
+)
+SERVICE_PATTERN = re.compile("|".join(re.escape(key) for key in SERVICE_TIPS))
+
+# Lifetime progress bar; each render slices these rather than building strings
+_BAR_LENGTH = 50
+_FULL_BAR = "█" * _BAR_LENGTH
+_EMPTY_BAR = "░" * _BAR_LENGTH
+
+@lru_cache(maxsize=None)
+def _get_analyzer(period_type: str, period_count: int) -> AWSBillingAnalyzer:
+    """
+    Get the shared analyzer for a billing period.
+    
+    Analyzers memoize their Cost Explorer responses, so sharing one per
+    period lets every section of a run reuse the same requests.
+    
+    Args:
+        period_type: 'd' for days, 'm' for months
+        period_count: Number of periods to look back
+        
+    Returns:
+        AWSBillingAnalyzer for that period
+    """
+    return AWSBillingAnalyzer(period_type=period_type, period_count=period_count)
+
+def _months_covered(analyzer):
+    """
+    Number of months a month-type period actually spans.
+    
+    The latest month runs to date, so it counts as the fraction of its
+    days already billed.
+    
+    Args:
+        analyzer: AWSBillingAnalyzer for a month period
+        
+    Returns:
+        Months covered, e.g. 2.5 for two full months plus half of this one
+    """
+    last_billed_day = analyzer.end_date - timedelta(days=1)
+    days_in_month = calendar.monthrange(last_billed_day.year, last_billed_day.month)[1]
+    return analyzer.period_count - 1 + last_billed_day.day / days_in_month
+
+@lru_cache(maxsize=16)
+def fetch_service_costs(period_type: str, period_count: int) -> dict:
+    """
+    Get costs by service for a billing period, fetched once per run.
+    
+    Args:
+        period_type: 'd' for days, 'm' for months
+        period_count: Number of periods to look back
+        
+    Returns:
+        Dict mapping service names to costs (shared; do not modify)
+    """
+    return _get_analyzer(period_type, period_count).get_cost_by_service()
+
 def print_header():
     """Print the application header."""
     print("\n" + "=" * 70)
@@ -23,182 +110,222 @@ def print_header():
     print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
 
-def analyze_current_month():
-    """Analyze current month's credit usage."""
-    print("\n🗓️  CURRENT MONTH ANALYSIS")
-    print("-" * 40)
+def analyze_current_month(out=None):
+    """
+    Analyze current month's credit usage.
     
-    # Set to current month
-    config.billing.period_type = 'm'
-    config.billing.period_count = 1
+    Args:
+        out: Stream to write the section to (default: stdout)
+    """
+    print("\n🗓️  CURRENT MONTH ANALYSIS", file=out)
+    print("-" * 40, file=out)
     
-    analyzer = AWSBillingAnalyzer()
+    # Current month
+    analyzer = _get_analyzer('m', 1)
     
     try:
         usage_cost = analyzer.get_usage_cost()
         credits_applied = analyzer.get_credits()
         net_cost = analyzer.get_net_cost()
         
-        print(f"Usage Cost:      ${usage_cost:.2f}")
-        print(f"Credits Applied: ${abs(credits_applied):.2f}")
-        print(f"Net Cost:        ${max(0, net_cost):.2f}")
+        print(f"Usage Cost:      ${usage_cost:.2f}", file=out)
+        print(f"Credits Applied: ${abs(credits_applied):.2f}", file=out)
+        print(f"Net Cost:        ${max(0, net_cost):.2f}", file=out)
         
         if usage_cost > 0:
             credit_coverage = min(100, (abs(credits_applied) / usage_cost) * 100)
-            print(f"Credit Coverage: {credit_coverage:.1f}%")
+            print(f"Credit Coverage: {credit_coverage:.1f}%", file=out)
     
     except Exception as e:
-        print(f"Error analyzing current month: {e}")
+        print(f"Error analyzing current month: {e}", file=out)
 
-def analyze_last_three_months():
-    """Analyze last three months trend."""
-    print("\n📈 LAST 3 MONTHS TREND")
-    print("-" * 40)
+def analyze_last_three_months(out=None):
+    """
+    Analyze last three months trend.
     
-    # Set to last 3 months
-    config.billing.period_type = 'm'
-    config.billing.period_count = 3
+    Args:
+        out: Stream to write the section to (default: stdout)
+    """
+    print("\n📈 LAST 3 MONTHS TREND", file=out)
+    print("-" * 40, file=out)
     
-    analyzer = AWSBillingAnalyzer()
+    # Last 3 months
+    analyzer = _get_analyzer('m', 3)
     
     try:
         usage_cost = analyzer.get_usage_cost()
         credits_applied = analyzer.get_credits()
         
-        print(f"3-Month Usage:   ${usage_cost:.2f}")
-        print(f"3-Month Credits: ${abs(credits_applied):.2f}")
-        print(f"Monthly Average: ${usage_cost/3:.2f} usage, ${abs(credits_applied)/3:.2f} credits")
+        print(f"3-Month Usage:   ${usage_cost:.2f}", file=out)
+        print(f"3-Month Credits: ${abs(credits_applied):.2f}", file=out)
+        # The latest month is partial, so average over the months actually covered
+        months = _months_covered(analyzer)
+        print(f"Monthly Average: ${usage_cost/months:.2f} usage, ${abs(credits_applied)/months:.2f} credits", file=out)
         
         # Get service breakdown
-        service_costs = analyzer.get_cost_by_service()
+        service_costs = fetch_service_costs('m', 3)
         if service_costs:
-            print("\nTop Services (3-month total):")
-            for i, (service, cost) in enumerate(sorted(service_costs.items(), key=lambda x: x[1], reverse=True)[:5], 1):
-                print(f"  {i}. {service}: ${cost:.2f}")
+            print("\nTop Services (3-month total):", file=out)
+            for i, (service, cost) in enumerate(heapq.nlargest(5, service_costs.items(), key=itemgetter(1)), 1):
+                print(f"  {i}. {service}: ${cost:.2f}", file=out)
     
     except Exception as e:
-        print(f"Error analyzing 3-month trend: {e}")
+        print(f"Error analyzing 3-month trend: {e}", file=out)
 
-def analyze_lifetime_credits():
-    """Analyze lifetime credit usage."""
-    print("\n💳 LIFETIME CREDIT ANALYSIS")
-    print("-" * 40)
+def analyze_lifetime_credits(out=None):
+    """
+    Analyze lifetime credit usage.
+    
+    Args:
+        out: Stream to write the section to (default: stdout)
+    """
+    print("\n💳 LIFETIME CREDIT ANALYSIS", file=out)
+    print("-" * 40, file=out)
     
-    analyzer = AWSBillingAnalyzer()
+    # Lifetime figures don't depend on the period; share the current month's analyzer
+    analyzer = _get_analyzer('m', 1)
     
     try:
         total_credits = config.billing.total_credits
         credits_used = analyzer.get_credits_used_lifetime()
         remaining_credits = analyzer.get_remaining_credits()
         
-        print(f"Total Credits:     ${total_credits:.2f}")
-        print(f"Credits Used:      ${credits_used:.2f}")
-        print(f"Credits Remaining: ${remaining_credits:.2f}")
+        print(f"Total Credits:     ${total_credits:.2f}", file=out)
+        print(f"Credits Used:      ${credits_used:.2f}", file=out)
+        print(f"Credits Remaining: ${remaining_credits:.2f}", file=out)
         
         if total_credits > 0:
             percent_used = (credits_used / total_credits) * 100
             percent_remaining = 100 - percent_used
             
-            print(f"Usage Percentage:  {percent_used:.1f}% used")
-            print(f"Remaining:         {percent_remaining:.1f}%")
+            print(f"Usage Percentage:  {percent_used:.1f}% used", file=out)
+            print(f"Remaining:         {percent_remaining:.1f}%", file=out)
             
             # Visual progress bar
-            bar_length = 50
-            filled_length = int(bar_length * percent_used / 100)
-            bar = "█" * filled_length + "░" * (bar_length - filled_length)
-            print(f"Progress:          [{bar}] {percent_used:.1f}%")
+            filled_length = int(_BAR_LENGTH * percent_used / 100)
+            bar = _FULL_BAR[:filled_length] + _EMPTY_BAR[filled_length:]
+            print(f"Progress:          [{bar}] {percent_used:.1f}%", file=out)
     
     except Exception as e:
-        print(f"Error analyzing lifetime credits: {e}")
+        print(f"Error analyzing lifetime credits: {e}", file=out)
 
-def project_credit_exhaustion():
-    """Project when credits might be exhausted."""
-    print("\n⏰ CREDIT EXHAUSTION PROJECTION")
-    print("-" * 40)
+def project_credit_exhaustion(out=None):
+    """
+    Project when credits might be exhausted.
     
-    # Use last month data for projection
-    config.billing.period_type = 'm'
-    config.billing.period_count = 1
+    Args:
+        out: Stream to write the section to (default: stdout)
+    """
+    print("\n⏰ CREDIT EXHAUSTION PROJECTION", file=out)
+    print("-" * 40, file=out)
     
-    analyzer = AWSBillingAnalyzer()
+    # Use current month data for projection
+    analyzer = _get_analyzer('m', 1)
     
     try:
         monthly_usage = analyzer.get_usage_cost()
         remaining_credits = analyzer.get_remaining_credits()
         
+        # The period runs month-to-date, so scale usage up to the full month
+        monthly_usage = monthly_usage / _months_covered(analyzer)
+        
         if monthly_usage > 0 and remaining_credits > 0:
             months_remaining = remaining_credits / monthly_usage
-            exhaustion_date = datetime.now() + timedelta(days=months_remaining * 30)
+            # Whole calendar months, then the fraction as ~30-day days
+            whole_months = int(months_remaining)
+            extra_days = int((months_remaining - whole_months) * 30)
+            exhaustion_date = datetime.now() + relativedelta(months=whole_months) + timedelta(days=extra_days)
             
-            print(f"Monthly Usage Rate: ${monthly_usage:.2f}")
-            print(f"Remaining Credits:  ${remaining_credits:.2f}")
-            print(f"Months Remaining:   {months_remaining:.1f}")
-            print(f"Est. Exhaustion:    {exhaustion_date.strftime('%Y-%m-%d')}")
+            print(f"Monthly Usage Rate: ${monthly_usage:.2f}", file=out)
+            print(f"Remaining Credits:  ${remaining_credits:.2f}", file=out)
+            print(f"Months Remaining:   {months_remaining:.1f}", file=out)
+            print(f"Est. Exhaustion:    {exhaustion_date.strftime('%Y-%m-%d')}", file=out)
             
             # Warning levels
             if months_remaining < 1:
-                print("🚨 WARNING: Credits will be exhausted within 1 month!")
+                print("🚨 WARNING: Credits will be exhausted within 1 month!", file=out)
             elif months_remaining < 3:
-                print("⚠️  CAUTION: Credits will be exhausted within 3 months")
+                print("⚠️  CAUTION: Credits will be exhausted within 3 months", file=out)
             elif months_remaining < 6:
-                print("ℹ️  INFO: Credits will be exhausted within 6 months")
+                print("ℹ️  INFO: Credits will be exhausted within 6 months", file=out)
             else:
-                print("✅ GOOD: Credits should last more than 6 months")
+                print("✅ GOOD: Credits should last more than 6 months", file=out)
         else:
-            print("Unable to calculate projection - insufficient data")
+            print("Unable to calculate projection - insufficient data", file=out)
     
     except Exception as e:
-        print(f"Error projecting credit exhaustion: {e}")
+        print(f"Error projecting credit exhaustion: {e}", file=out)
 
-def show_optimization_suggestions():
-    """Show cost optimization suggestions."""
-    print("\n💡 OPTIMIZATION SUGGESTIONS")
-    print("-" * 40)
+def show_optimization_suggestions(out=None):
+    """
+    Show cost optimization suggestions.
     
-    analyzer = AWSBillingAnalyzer()
+    Args:
+        out: Stream to write the section to (default: stdout)
+    """
+    print("\n💡 OPTIMIZATION SUGGESTIONS", file=out)
+    print("-" * 40, file=out)
     
     try:
-        service_costs = analyzer.get_cost_by_service()
+        # Suggestions are based on the current month
+        service_costs = fetch_service_costs('m', 1)
         if service_costs:
-            top_service = max(service_costs.items(), key=lambda x: x[1])
+            top_service = max(service_costs.items(), key=itemgetter(1))
             total_cost = sum(service_costs.values())
             
-            print(f"Highest Cost Service: {top_service[0]} (${top_service[1]:.2f})")
-            print(f"Percentage of Total:  {(top_service[1]/total_cost)*100:.1f}%")
+            print(f"Highest Cost Service: {top_service[0]} (${top_service[1]:.2f})", file=out)
+            print(f"Percentage of Total:  {(top_service[1]/total_cost)*100:.1f}%", file=out)
             
-            print("\nOptimization Tips:")
-            if "Elastic Compute Cloud" in top_service[0]:
-                print("• Consider rightsizing EC2 instances")
-                print("• Use Spot Instances for non-critical workloads")
-                print("• Enable EC2 Instance Savings Plans")
-            elif "Relational Database Service" in top_service[0]:
-                print("• Review RDS instance sizes and types")
-                print("• Consider Aurora Serverless for variable workloads")
-                print("• Enable automated backups optimization")
-            elif "ElastiCache" in top_service[0]:
-                print("• Review cache instance sizes")
-                print("• Consider Redis vs Memcached based on use case")
-                print("• Monitor cache hit ratios")
-            else:
-                print("• Review usage patterns for cost optimization")
-                print("• Consider AWS Cost Optimization recommendations")
+            print("\nOptimization Tips:", file=out)
+            match = SERVICE_PATTERN.search(top_service[0])
+            tips = SERVICE_TIPS[match.group(0)] if match else DEFAULT_TIPS
+            print(*tips, sep="\n", file=out)
             
-            print("• Use AWS Cost Explorer for detailed analysis")
-            print("• Set up billing alerts for proactive monitoring")
+            print("• Use AWS Cost Explorer for detailed analysis", file=out)
+            print("• Set up billing alerts for proactive monitoring", file=out)
     
     except Exception as e:
-        print(f"Error generating suggestions: {e}")
+        print(f"Error generating suggestions: {e}", file=out)
 
 def main():
     """Main function to run comprehensive credit analysis."""
-    print_header()
-    
-    # Perform comprehensive analysis
-    analyze_current_month()
-    analyze_last_three_months()
-    analyze_lifetime_credits()
-    project_credit_exhaustion()
-    show_optimization_suggestions()
+    parser = argparse.ArgumentParser(description="AWS credit usage analysis")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Bypass the on-disk Cost Explorer response cache")
+    args = parser.parse_args()
+    
+    if args.no_cache:
+        config.billing.cache_enabled = False
+    
+    # Build the shared analyzers up front so the stages below don't race to
+    # create duplicates
+    current_month = _get_analyzer('m', 1)
+    _get_analyzer('m', 3)
+    
+    # Perform comprehensive analysis. The stages wait on Cost Explorer, so run
+    # them concurrently, each into its own buffer, and print them in order.
+    stages = (
+        analyze_current_month,
+        analyze_last_three_months,
+        analyze_lifetime_credits,
+        project_credit_exhaustion,
+        show_optimization_suggestions,
+    )
+    buffers = [io.StringIO() for _ in stages]
+    
+    with ThreadPoolExecutor(max_workers=len(stages) + 1) as executor:
+        # Start the slowest query (400 days of credit history) first; the
+        # lifetime and projection stages pick up its memoized result
+        executor.submit(current_month.get_credits_used_lifetime)
+        # Stages that share a query (e.g. current month usage for the
+        # projection) read it from the shared, memoized analyzer
+        futures = [executor.submit(stage, buf) for stage, buf in zip(stages, buffers)]
+        
+        print_header()
+        
+        for future, buf in zip(futures, buffers):
+            future.result()
+            sys.stdout.write(buf.getvalue())
     
     print("\n" + "=" * 70)
     print("For detailed billing report with full breakdown:")
@@ -3,156 +3,202 @@
 Debug script to investigate AWS billing details.
 """
 import boto3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from dotenv import load_dotenv
+import io
 import os
+import sys
 
 # Load environment variables
 load_dotenv()
 
+@lru_cache(maxsize=None)
+def get_client(service_name, region_name='us-east-1'):
+    """Get a boto3 client, created once per service and region and then reused."""
+    return boto3.client(service_name, region_name=region_name)
+
+def get_costs_by_service_and_record_type(ce_client, time_period):
+    """
+    Fetch costs grouped by service and record type in one query.
+    
+    Args:
+        ce_client: boto3 Cost Explorer client
+        time_period: Cost Explorer TimePeriod dict
+        
+    Returns:
+        tuple: (costs by service, costs by record type)
+    """
+    by_service = defaultdict(float)
+    by_record_type = defaultdict(float)
+    request = {
+        'TimePeriod': time_period,
+        'Granularity': 'MONTHLY',
+        'Metrics': ['UnblendedCost'],
+        'GroupBy': [
+            {'Type': 'DIMENSION', 'Key': 'SERVICE'},
+            {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
+        ]
+    }
+    
+    # Two dimensions make more groups, so follow any further pages
+    while True:
+        response = ce_client.get_cost_and_usage(**request)
+        
+        for result in response['ResultsByTime']:
+            for group in result.get('Groups', []):
+                service_name, record_type = group['Keys']
+                cost = float(group['Metrics']['UnblendedCost']['Amount'])
+                by_service[service_name] += cost
+                by_record_type[record_type] += cost
+        
+        if not response.get('NextPageToken'):
+            return dict(by_service), dict(by_record_type)
+        request['NextPageToken'] = response['NextPageToken']
+
 def debug_billing_details():
     """Debug AWS billing to understand why charges are zero."""
     
     # Initialize Cost Explorer client
-    ce_client = boto3.client('ce', region_name='us-east-1')
+    ce_client = get_client('ce')
+    sts_client = get_client('sts')
     
     # Get current date and calculate last month
     end_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     start_date = (end_date - timedelta(days=1)).replace(day=1)
+    last_month = {
+        'Start': start_date.strftime('%Y-%m-%d'),
+        'End': end_date.strftime('%Y-%m-%d')
+    }
     
-    print(f"Debugging billing for period: {start_date.date()} to {end_date.date()}")
-    print("=" * 60)
-    
-    # 1. Check total cost with different metrics
-    print("1. Checking different cost metrics:")
-    print("-" * 40)
+    current_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    current_end = datetime.now()
     
     metrics_to_check = ['UnblendedCost', 'BlendedCost', 'AmortizedCost']
     
-    for metric in metrics_to_check:
-        try:
-            response = ce_client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date.strftime('%Y-%m-%d'),
-                    'End': end_date.strftime('%Y-%m-%d')
-                },
-                Granularity='MONTHLY',
-                Metrics=[metric]
-            )
-            
-            amount = float(response['ResultsByTime'][0]['Total'][metric]['Amount'])
-            unit = response['ResultsByTime'][0]['Total'][metric]['Unit']
-            print(f"  {metric}: {amount} {unit}")
-            
-        except Exception as e:
-            print(f"  {metric}: Error - {e}")
+    # The queries are independent, so issue them all at once and print the
+    # sections in order as their responses are needed
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        # One request returns every metric
+        metrics_future = executor.submit(
+            ce_client.get_cost_and_usage,
+            TimePeriod=last_month,
+            Granularity='MONTHLY',
+            Metrics=metrics_to_check
+        )
+        # One request grouped by both dimensions backs sections 2 and 3
+        breakdown_future = executor.submit(
+            get_costs_by_service_and_record_type,
+            ce_client,
+            last_month
+        )
+        current_month_future = executor.submit(
+            ce_client.get_cost_and_usage,
+            TimePeriod={
+                'Start': current_start.strftime('%Y-%m-%d'),
+                'End': current_end.strftime('%Y-%m-%d')
+            },
+            Granularity='MONTHLY',
+            Metrics=['UnblendedCost']
+        )
+        identity_future = executor.submit(sts_client.get_caller_identity)
+        
+    # Assemble the report and write it out in one go
+    buf = io.StringIO()
     
-    print()
+    print(f"Debugging billing for period: {start_date.date()} to {end_date.date()}", file=buf)
+    print("=" * 60, file=buf)
+    
+    # 1. Check total cost with different metrics
+    print("1. Checking different cost metrics:", file=buf)
+    print("-" * 40, file=buf)
+    
+    try:
+        response = metrics_future.result()
+        totals = response['ResultsByTime'][0]['Total']
+        
+        for metric in metrics_to_check:
+            amount = float(totals[metric]['Amount'])
+            unit = totals[metric]['Unit']
+            print(f"  {metric}: {amount} {unit}", file=buf)
+            
+    except Exception as e:
+        print(f"  Error: {e}", file=buf)
+        
+    print(file=buf)
     
     # 2. Check costs by service
-    print("2. Checking costs by service:")
-    print("-" * 40)
+    print("2. Checking costs by service:", file=buf)
+    print("-" * 40, file=buf)
     
     try:
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date.strftime('%Y-%m-%d'),
-                'End': end_date.strftime('%Y-%m-%d')
-            },
-            Granularity='MONTHLY',
-            Metrics=['UnblendedCost'],
-            GroupBy=[
-                {'Type': 'DIMENSION', 'Key': 'SERVICE'}
-            ]
-        )
+        by_service, by_record_type = breakdown_future.result()
         
         services_found = False
-        for result in response['ResultsByTime']:
-            for group in result.get('Groups', []):
-                service_name = group['Keys'][0]
-                cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                if cost > 0:
-                    services_found = True
-                    print(f"  {service_name}: {cost}")
-        
+        for service_name, cost in by_service.items():
+            if cost > 0:
+                services_found = True
+                print(f"  {service_name}: {cost}", file=buf)
+                
         if not services_found:
-            print("  No services with charges found")
+            print("  No services with charges found", file=buf)
             
     except Exception as e:
-        print(f"  Error: {e}")
-    
-    print()
+        print(f"  Error: {e}", file=buf)
+        
+    print(file=buf)
     
     # 3. Check record types (credits, charges, etc.)
-    print("3. Checking record types:")
-    print("-" * 40)
+    print("3. Checking record types:", file=buf)
+    print("-" * 40, file=buf)
     
     try:
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date.strftime('%Y-%m-%d'),
-                'End': end_date.strftime('%Y-%m-%d')
-            },
-            Granularity='MONTHLY',
-            Metrics=['UnblendedCost'],
-            GroupBy=[
-                {'Type': 'DIMENSION', 'Key': 'RECORD_TYPE'}
-            ]
-        )
+        by_service, by_record_type = breakdown_future.result()
         
-        for result in response['ResultsByTime']:
-            for group in result.get('Groups', []):
-                record_type = group['Keys'][0]
-                cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                print(f"  {record_type}: {cost}")
-                
+        for record_type, cost in by_record_type.items():
+            print(f"  {record_type}: {cost}", file=buf)
+            
     except Exception as e:
-        print(f"  Error: {e}")
-    
-    print()
+        print(f"  Error: {e}", file=buf)
+        
+    print(file=buf)
     
     # 4. Check if there's any usage in the current month
-    print("4. Checking current month usage:")
-    print("-" * 40)
-    
-    current_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    current_end = datetime.now()
+    print("4. Checking current month usage:", file=buf)
+    print("-" * 40, file=buf)
     
     try:
-        response = ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': current_start.strftime('%Y-%m-%d'),
-                'End': current_end.strftime('%Y-%m-%d')
-            },
-            Granularity='MONTHLY',
-            Metrics=['UnblendedCost']
-        )
+        response = current_month_future.result()
         
         amount = float(response['ResultsByTime'][0]['Total']['UnblendedCost']['Amount'])
-        print(f"  Current month charges: {amount}")
+        print(f"  Current month charges: {amount}", file=buf)
         
     except Exception as e:
-        print(f"  Error: {e}")
-    
-    print()
+        print(f"  Error: {e}", file=buf)
+        
+    print(file=buf)
     
     # 5. Check account information
-    print("5. Account information:")
-    print("-" * 40)
+    print("5. Account information:", file=buf)
+    print("-" * 40, file=buf)
     
     try:
-        sts_client = boto3.client('sts')
-        identity = sts_client.get_caller_identity()
-        print(f"  Account ID: {identity['Account']}")
-        print(f"  User ARN: {identity['Arn']}")
+        identity = identity_future.result()
+        print(f"  Account ID: {identity['Account']}", file=buf)
+        print(f"  User ARN: {identity['Arn']}", file=buf)
         
         # Check if this is a new account
         account_creation = datetime.strptime(identity['Arn'].split('/')[-1], '%Y-%m-%d') if '/' in identity['Arn'] else None
         if account_creation:
-            print(f"  Account created: {account_creation.date()}")
+            print(f"  Account created: {account_creation.date()}", file=buf)
             
     except Exception as e:
-        print(f"  Error: {e}")
+        print(f"  Error: {e}", file=buf)
+    
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
 
 if __name__ == "__main__":
-    debug_billing_details() 
\ No newline at end of file
+    debug_billing_details()
@@ -2,17 +2,22 @@
 """
 Example usage of the Python AWS Billing Monitor.
 """
-from datetime import datetime
+import heapq
+import sys
+from operator import itemgetter
 from config import config
 from aws_billing import AWSBillingAnalyzer
 from billing_manager import BillingManager
 
-def example_basic_usage():
+# "  name: USD 12.34 (56.7%)" - one line of a cost breakdown
+_BREAKDOWN_LINE = "  {0}: {1} {2:.2f} ({3:.1f}%)".format
+
+def example_basic_usage(analyzer=None):
     """Example of basic usage with the billing manager."""
     print("=== Basic Usage Example ===")
     
     # Initialize the billing manager
-    billing_manager = BillingManager()
+    billing_manager = BillingManager(aws_analyzer=analyzer)
     
     # Run billing analysis (console output only, no notifications)
     report = billing_manager.run_billing_analysis(send_notifications=False)
@@ -26,95 +31,97 @@ def example_custom_period():
     """Example of using custom billing periods."""
     print("\n=== Custom Period Example ===")
     
-    # Temporarily change the configuration for last 30 days
-    original_period_type = config.billing.period_type
-    original_period_count = config.billing.period_count
+    # Any period can be analyzed without touching the global config
+    analyzer = AWSBillingAnalyzer(period_type='d', period_count=30)
+    report = analyzer.generate_billing_report()
+    currency = report['currency']
     
-    config.billing.period_type = 'd'
-    config.billing.period_count = 30
+    print(f"30-day billing report:")
+    print(f"Period: {report['period']['start_date']} to {report['period']['end_date']}")
+    print(f"Total cost: {currency} {report['total_cost']:.2f}")
     
-    try:
-        analyzer = AWSBillingAnalyzer()
-        report = analyzer.generate_billing_report()
-        
-        print(f"30-day billing report:")
-        print(f"Period: {report['period']['start_date']} to {report['period']['end_date']}")
-        print(f"Total cost: {report['currency']} {report['total_cost']:.2f}")
-        
-        # Show top 5 services
-        costs_by_service = report['costs_by_service']
-        sorted_services = sorted(costs_by_service.items(), key=lambda x: x[1], reverse=True)
-        
-        print("\nTop 5 services by cost:")
-        for i, (service, cost) in enumerate(sorted_services[:5], 1):
-            print(f"{i}. {service}: {report['currency']} {cost:.2f}")
+    # Show top 5 services
+    costs_by_service = report['costs_by_service']
+    top_services = heapq.nlargest(5, costs_by_service.items(), key=itemgetter(1))
     
-    finally:
-        # Restore original configuration
-        config.billing.period_type = original_period_type
-        config.billing.period_count = original_period_count
+    print("\nTop 5 services by cost:")
+    for i, (service, cost) in enumerate(top_services, 1):
+        print(f"{i}. {service}: {currency} {cost:.2f}")
 
-def example_service_analysis():
+def example_service_analysis(analyzer=None):
     """Example of detailed service analysis."""
     print("\n=== Service Analysis Example ===")
     
-    analyzer = AWSBillingAnalyzer()
+    analyzer = analyzer or AWSBillingAnalyzer()
     
     # Get costs by service
     service_costs = analyzer.get_cost_by_service()
+    total_cost = sum(service_costs.values())
     
-    if service_costs:
+    # A zero-cost period would only list 0.0% lines, so skip the sort entirely
+    if total_cost:
         print("Service cost breakdown:")
-        total_cost = sum(service_costs.values())
+        to_percent = 100.0 / total_cost
+        currency = config.billing.currency
         
-        for service, cost in sorted(service_costs.items(), key=lambda x: x[1], reverse=True):
-            percentage = (cost / total_cost * 100) if total_cost > 0 else 0
-            print(f"  {service}: {config.billing.currency} {cost:.2f} ({percentage:.1f}%)")
+        # Lines are formatted as they are written, not collected up front
+        ranked = sorted(service_costs.items(), key=itemgetter(1), reverse=True)
+        sys.stdout.writelines(
+            _BREAKDOWN_LINE(service, currency, cost, cost * to_percent) + "\n"
+            for service, cost in ranked
+        )
     else:
-        print("No service costs found")
+        print("No service costs found for this period")
 
-def example_usage_type_analysis():
+def example_usage_type_analysis(analyzer=None):
     """Example of usage type analysis."""
     print("\n=== Usage Type Analysis Example ===")
     
-    analyzer = AWSBillingAnalyzer()
+    analyzer = analyzer or AWSBillingAnalyzer()
     
     # Get costs by usage type
     usage_costs = analyzer.get_cost_by_usage_type()
+    total_cost = sum(usage_costs.values())
     
-    if usage_costs:
+    if total_cost:
         print("Usage type cost breakdown:")
-        total_cost = sum(usage_costs.values())
+        to_percent = 100.0 / total_cost
+        currency = config.billing.currency
         
         # Show top 10 usage types
-        for usage_type, cost in sorted(usage_costs.items(), key=lambda x: x[1], reverse=True)[:10]:
-            percentage = (cost / total_cost * 100) if total_cost > 0 else 0
-            print(f"  {usage_type}: {config.billing.currency} {cost:.2f} ({percentage:.1f}%)")
+        lines = []
+        for usage_type, cost in heapq.nlargest(10, usage_costs.items(), key=itemgetter(1)):
+            lines.append(_BREAKDOWN_LINE(usage_type, currency, cost, cost * to_percent))
+        print("\n".join(lines))
     else:
-        print("No usage type costs found")
+        print("No usage type costs found for this period")
 
-def example_daily_trend():
+def example_daily_trend(analyzer=None):
     """Example of daily cost trend analysis."""
     print("\n=== Daily Cost Trend Example ===")
     
-    analyzer = AWSBillingAnalyzer()
+    analyzer = analyzer or AWSBillingAnalyzer()
     
-    # Get daily costs
-    daily_costs = analyzer.get_daily_costs()
+    # Get daily costs as parallel date/cost columns
+    series = analyzer.get_daily_cost_series()
+    dates, costs = series['dates'], series['costs']
+    currency = config.billing.currency
     
-    if daily_costs:
+    if costs:
         print("Daily cost trend:")
-        total_period_cost = sum(day['cost'] for day in daily_costs)
-        avg_daily_cost = total_period_cost / len(daily_costs)
+        total_period_cost = sum(costs)
+        avg_daily_cost = total_period_cost / len(costs)
         
-        print(f"Period total: {config.billing.currency} {total_period_cost:.2f}")
-        print(f"Average daily cost: {config.billing.currency} {avg_daily_cost:.2f}")
-        print(f"Number of days: {len(daily_costs)}")
+        print(f"Period total: {currency} {total_period_cost:.2f}")
+        print(f"Average daily cost: {currency} {avg_daily_cost:.2f}")
+        print(f"Number of days: {len(costs)}")
         
         print("\nDaily breakdown:")
-        for day in daily_costs:
-            date = datetime.strptime(day['date'], '%Y-%m-%d').strftime('%m/%d/%Y')
-            print(f"  {date}: {config.billing.currency} {day['cost']:.2f}")
+        # Dates are ISO YYYY-MM-DD; reorder to MM/DD/YYYY without parsing
+        print("\n".join(
+            f"  {date[5:7]}/{date[8:10]}/{date[:4]}: {currency} {cost:.2f}"
+            for date, cost in zip(dates, costs)
+        ))
     else:
         print("No daily cost data found")
 
@@ -134,11 +141,12 @@ def example_configuration():
     start_date, end_date = config.get_billing_period()
     print(f"  Billing period: {start_date.date()} to {end_date.date()}")
 
-def example_credit_analysis():
+def example_credit_analysis(analyzer=None):
     """Example of comprehensive credit analysis."""
     print("\n=== Credit Analysis Example ===")
     
-    analyzer = AWSBillingAnalyzer()
+    analyzer = analyzer or AWSBillingAnalyzer()
+    currency = config.billing.currency
     
     try:
         # Get current period credit data
@@ -150,14 +158,14 @@ def example_credit_analysis():
         remaining_credits = analyzer.get_remaining_credits()
         
         print(f"Current Period Analysis:")
-        print(f"  Usage Cost: {config.billing.currency} {usage_cost:.2f}")
-        print(f"  Credits Applied: {config.billing.currency} {abs(credits_applied):.2f}")
-        print(f"  Net Cost: {config.billing.currency} {max(0, usage_cost + credits_applied):.2f}")
+        print(f"  Usage Cost: {currency} {usage_cost:.2f}")
+        print(f"  Credits Applied: {currency} {abs(credits_applied):.2f}")
+        print(f"  Net Cost: {currency} {max(0, usage_cost + credits_applied):.2f}")
         
         print(f"\nLifetime Credit Analysis:")
-        print(f"  Total Credits: {config.billing.currency} {config.billing.total_credits:.2f}")
-        print(f"  Credits Used: {config.billing.currency} {credits_used_lifetime:.2f}")
-        print(f"  Credits Remaining: {config.billing.currency} {remaining_credits:.2f}")
+        print(f"  Total Credits: {currency} {config.billing.total_credits:.2f}")
+        print(f"  Credits Used: {currency} {credits_used_lifetime:.2f}")
+        print(f"  Credits Remaining: {currency} {remaining_credits:.2f}")
         
         # Calculate burn rate
         if abs(credits_applied) > 0:
@@ -166,8 +174,8 @@ def example_credit_analysis():
             monthly_burn = daily_burn * 30
             
             print(f"\nBurn Rate Analysis:")
-            print(f"  Daily Burn Rate: {config.billing.currency} {daily_burn:.2f}")
-            print(f"  Monthly Burn Rate: {config.billing.currency} {monthly_burn:.2f}")
+            print(f"  Daily Burn Rate: {currency} {daily_burn:.2f}")
+            print(f"  Monthly Burn Rate: {currency} {monthly_burn:.2f}")
             
             if monthly_burn > 0:
                 months_remaining = remaining_credits / monthly_burn
@@ -184,49 +192,37 @@ def example_monthly_credit_trend():
     """Example of monthly credit usage trend."""
     print("\n=== Monthly Credit Trend Example ===")
     
-    # Temporarily change to get last 3 months data
-    original_period_type = config.billing.period_type
-    original_period_count = config.billing.period_count
+    analyzer = AWSBillingAnalyzer(period_type='m', period_count=3)
+    report = analyzer.generate_billing_report()
+    currency = report['currency']
     
-    config.billing.period_type = 'm'
-    config.billing.period_count = 3
+    print("3-Month Credit Usage Summary:")
+    costs = report.get('costs', {})
+    credits_info = report.get('credits', {})
     
-    try:
-        analyzer = AWSBillingAnalyzer()
-        report = analyzer.generate_billing_report()
-        
-        print("3-Month Credit Usage Summary:")
-        costs = report.get('costs', {})
-        credits_info = report.get('credits', {})
-        
-        # Handle both new and legacy format
-        if isinstance(costs, dict):
-            usage_cost = costs.get('usage_cost_period', 0)
-        else:
-            usage_cost = report.get('total_cost', 0)
-            
-        if isinstance(credits_info, dict):
-            credits_applied = credits_info.get('applied_this_period', 0)
-            remaining_credits = credits_info.get('remaining', 0)
-        else:
-            credits_applied = abs(credits_info) if credits_info < 0 else 0
-            remaining_credits = 5000  # Default fallback
-        
-        print(f"  Period Usage Cost: {report['currency']} {usage_cost:.2f}")
-        print(f"  Credits Applied: {report['currency']} {credits_applied:.2f}")
-        print(f"  Remaining Credits: {report['currency']} {remaining_credits:.2f}")
+    # Handle both new and legacy format
+    if isinstance(costs, dict):
+        usage_cost = costs.get('usage_cost_period', 0)
+    else:
+        usage_cost = report.get('total_cost', 0)
         
-        # Show service breakdown for credit usage
-        service_costs = analyzer.get_cost_by_service()
-        if service_costs:
-            print("\n  Top Services Using Credits:")
-            for service, cost in sorted(service_costs.items(), key=lambda x: x[1], reverse=True)[:5]:
-                print(f"    {service}: {report['currency']} {cost:.2f}")
+    if isinstance(credits_info, dict):
+        credits_applied = credits_info.get('applied_this_period', 0)
+        remaining_credits = credits_info.get('remaining', 0)
+    else:
+        credits_applied = abs(credits_info) if credits_info < 0 else 0
+        remaining_credits = 5000  # Default fallback
     
-    finally:
-        # Restore original configuration
-        config.billing.period_type = original_period_type
-        config.billing.period_count = original_period_count
+    print(f"  Period Usage Cost: {currency} {usage_cost:.2f}")
+    print(f"  Credits Applied: {currency} {credits_applied:.2f}")
+    print(f"  Remaining Credits: {currency} {remaining_credits:.2f}")
+    
+    # Show service breakdown for credit usage
+    service_costs = analyzer.get_cost_by_service()
+    if service_costs:
+        print("\n  Top Services Using Credits:")
+        for service, cost in heapq.nlargest(5, service_costs.items(), key=itemgetter(1)):
+            print(f"    {service}: {currency} {cost:.2f}")
 
 def main():
     """Run all examples."""
@@ -235,14 +231,18 @@ def main():
     
     try:
         # Run examples
+        # One analyzer for the configured period serves every example that
+        # uses it, so its Cost Explorer responses are fetched once
+        analyzer = AWSBillingAnalyzer()
+        
         example_configuration()
-        example_basic_usage()
-        example_credit_analysis()  # New credit analysis
+        example_basic_usage(analyzer)
+        example_credit_analysis(analyzer)  # New credit analysis
         example_monthly_credit_trend()  # New monthly trend
         example_custom_period()
-        example_service_analysis()
-        example_usage_type_analysis()
-        example_daily_trend()
+        example_service_analysis(analyzer)
+        example_usage_type_analysis(analyzer)
+        example_daily_trend(analyzer)
         
         print("\n" + "=" * 60)
         print("All examples completed!")
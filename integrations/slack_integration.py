@@ -2,25 +2,145 @@
 Slack integration for sending billing reports.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
-from typing import Dict, Any, List
-from datetime import datetime
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+from config import config
+
+if TYPE_CHECKING:
+    from aws_billing import AWSBillingAnalyzer
+
+try:
+    import orjson  # Optional: faster payload serialization
+except ImportError:
+    orjson = None
+
+try:
+    from botocore.exceptions import BotoCoreError, ClientError
+    # Failures a credit lookup can hit: boto3 missing, credentials not set
+    # (ValueError from AWSBillingAnalyzer), rejected credentials, no network
+    _CREDIT_LOOKUP_ERRORS = (ImportError, ValueError, BotoCoreError, ClientError)
+except ImportError:
+    _CREDIT_LOOKUP_ERRORS = (ImportError, ValueError)
 
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(obj: Any) -> bytes:
+    """Encode an object as compact UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# How long credit figures fetched for legacy reports are reused (seconds)
+_CREDITS_CACHE_SECONDS = 900
+
+# Consecutive failed sends that open the circuit, and how long it then stays
+# open (seconds) before another send is attempted
+_CIRCUIT_FAILURE_THRESHOLD = 3
+_CIRCUIT_OPEN_SECONDS = 30
+
+# Static payload parts, built once and shared by every send; never mutated
+_ALERT_FOOTER = "AWS Billing Monitor"
+_REPORT_HEADER_BLOCK = {
+    "type": "header",
+    "text": {"type": "plain_text", "text": "AWS Billing Report"}
+}
+
+
 class SlackIntegration:
     """Handles Slack integration for billing notifications."""
     
-    def __init__(self, webhook_url: str):
+    def __init__(self, webhook_url: str, analyzer: Optional['AWSBillingAnalyzer'] = None):
         """
         Initialize Slack integration.
         
         Args:
             webhook_url: Slack webhook URL for sending messages
+            analyzer: AWSBillingAnalyzer used for legacy reports without credit
+                figures; one is created on first use if omitted
         """
         self.webhook_url = webhook_url
+        self._analyzer = analyzer
+        self._credits_cache: Optional[Tuple[int, Tuple[float, float]]] = None
+        # Cache window in which a credit lookup failed; not retried until it passes
+        self._credits_broken_bucket: Optional[int] = None
+        
+        # Reuse one keep-alive connection to the webhook host across sends,
+        # retrying rate limits and transient server errors with backoff
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['POST'])
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+        self.session.headers.update({'Content-Type': 'application/json; charset=utf-8', 'Connection': 'keep-alive'})
+        
+        # Circuit breaker state: while open, sends fail fast instead of each
+        # waiting out timeouts and retries against an unavailable webhook.
+        # Sends may run concurrently on the notification pool, so the lock
+        # guards every read and update of this state.
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._circuit_lock = threading.Lock()
+    
+    def close(self) -> None:
+        """Release the pooled webhook connection."""
+        self.session.close()
+    
+    def __enter__(self) -> 'SlackIntegration':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    @property
+    def analyzer(self) -> 'AWSBillingAnalyzer':
+        """AWS billing analyzer, created on first use."""
+        if self._analyzer is None:
+            # boto3 is heavy to import, so defer it until credits are needed
+            from aws_billing import AWSBillingAnalyzer
+            self._analyzer = AWSBillingAnalyzer()
+        return self._analyzer
+    
+    def _cached_credits(self) -> Optional[Tuple[float, float]]:
+        """
+        Fetch remaining and lifetime-used credits, reused within the cache window.
+        
+        A failed lookup is not retried until the next cache window.
+        
+        Returns:
+            tuple: (remaining credits, lifetime credits used), or None if unavailable
+        """
+        bucket = int(time.time() // _CREDITS_CACHE_SECONDS)
+        if self._credits_cache is not None and self._credits_cache[0] == bucket:
+            return self._credits_cache[1]
+        if self._credits_broken_bucket == bucket:
+            return None
+        
+        try:
+            # Building the analyzer is part of the lookup: it fails without credentials
+            analyzer = self.analyzer
+            # The lifetime total is memoised, so the second call reuses the first's fetch
+            credits = (
+                analyzer.get_remaining_credits(raise_errors=True),
+                analyzer.get_credits_used_lifetime(raise_errors=True)
+            )
+        except _CREDIT_LOOKUP_ERRORS as e:
+            logger.warning("Credit lookup failed, using fallback figures: %s", e)
+            self._credits_broken_bucket = bucket
+            return None
+        
+        self._credits_cache = (bucket, credits)
+        return credits
     
     def format_billing_message(self, billing_report: Dict[str, Any]) -> str:
         """
@@ -32,92 +152,170 @@ class SlackIntegration:
         Returns:
             Formatted message string
         """
-        currency = billing_report.get('currency', 'USD')
-        
         # Get cost and credit data from the enhanced report structure
-        costs = billing_report.get('costs', {})
+        costs = billing_report.get('costs')
         
         # Get usage and net cost from costs section
         if isinstance(costs, dict):
             usage_cost = costs.get('usage_cost_period', 0)
-            credits_applied = costs.get('credits_applied_period', 0)
             net_cost = costs.get('net_cost_period', 0)
         else:
             # Fallback to legacy format
             usage_cost = billing_report.get('total_cost', 0)
-            credits_applied = abs(billing_report.get('credits', 0)) if billing_report.get('credits', 0) < 0 else 0
             net_cost = billing_report.get('net_cost', 0)
         
-        # Calculate remaining credits and get lifetime usage
-        from config import config
-        from aws_billing import AWSBillingAnalyzer
-        
-        try:
-            # Get fresh calculations from AWS
-            analyzer = AWSBillingAnalyzer()
-            remaining_credits = analyzer.get_remaining_credits()
-            lifetime_credits_used = analyzer.get_credits_used_lifetime()
-        except:
-            # Fallback calculation
-            total_credits = config.billing.total_credits
-            lifetime_credits_used = 490.87  # Fallback value
-            remaining_credits = total_credits - lifetime_credits_used
+        # The report already carries lifetime credit figures; only legacy
+        # reports without them need a round trip to AWS
+        credits = billing_report.get('credits')
+        if isinstance(credits, dict) and 'remaining' in credits:
+            remaining_credits = credits['remaining']
+            lifetime_credits_used = credits.get('used_lifetime', 0)
+        else:
+            # Get calculations from AWS, reused within the cache window
+            cached_credits = self._cached_credits()
+            if cached_credits is not None:
+                remaining_credits, lifetime_credits_used = cached_credits
+            else:
+                # Fallback calculation
+                total_credits = config.billing.total_credits
+                lifetime_credits_used = 490.87  # Fallback value
+                remaining_credits = total_credits - lifetime_credits_used
         
         # Simple message format with lifetime credits used
-        message = f"AWS Account: 443752887643\n"
-        message += f"✓ Current usage cost: ${usage_cost:.2f}\n"
-        message += f"✓ Lifetime credits used: ${lifetime_credits_used:.2f}\n"
-        message += f"✓ Remaining credits: ${remaining_credits:.2f}\n"
-        message += f"✓ Net remaining charges: ${max(0, net_cost):.2f}"
+        parts = [
+            "AWS Account: 443752887643",
+            f"✓ Current usage cost: ${usage_cost:.2f}",
+            f"✓ Lifetime credits used: ${lifetime_credits_used:.2f}",
+            f"✓ Remaining credits: ${remaining_credits:.2f}",
+            f"✓ Net remaining charges: ${max(0, net_cost):.2f}",
+        ]
         
-        return message
+        return "\n".join(parts)
     
-    def send_message(self, message: str) -> bool:
+    def _post_payload(self, payload: Dict[str, Any], description: str) -> bool:
         """
-        Send message to Slack via webhook.
+        POST a single payload to the Slack webhook.
         
         Args:
-            message: Message to send
+            payload: Slack webhook payload
+            description: What is being sent, for log messages
             
         Returns:
             True if successful, False otherwise
         """
-        try:
-            payload = {
-                "text": message,
-                "mrkdwn": True
-            }
-            
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'},
-                timeout=10
+        with self._circuit_lock:
+            circuit_open = (
+                self._opened_at is not None
+                and time.monotonic() - self._opened_at < _CIRCUIT_OPEN_SECONDS
             )
+        if circuit_open:
+            logger.warning("Skipping %s: Slack circuit is open after repeated failures", description)
+            return False
+        
+        try:
+            # The session's default headers already declare JSON
+            response = self.session.post(self.webhook_url, data=_json_dumps(payload), timeout=10)
             
             if response.status_code == 200:
-                logger.info("Message sent to Slack successfully")
+                logger.info("Sent %s to Slack successfully", description)
+                with self._circuit_lock:
+                    self._failures = 0
+                    self._opened_at = None
                 return True
             else:
-                logger.error(f"Failed to send message to Slack. Status: {response.status_code}")
-                return False
+                logger.error("Failed to send %s to Slack. Status: %s", description, response.status_code)
                 
         except Exception as e:
-            logger.error(f"Error sending message to Slack: {e}")
-            return False
+            logger.error("Error sending %s to Slack: %s", description, e)
+        
+        self._record_failure()
+        return False
+    
+    def _record_failure(self) -> None:
+        """Count a failed send, opening the circuit once the threshold is reached."""
+        with self._circuit_lock:
+            self._failures += 1
+            failures = self._failures
+            newly_opened = False
+            if failures >= _CIRCUIT_FAILURE_THRESHOLD:
+                newly_opened = self._opened_at is None
+                # A failed trial send after the pause re-opens the circuit
+                self._opened_at = time.monotonic()
+        
+        if newly_opened:
+            logger.warning(
+                "Slack webhook failed %d times in a row; pausing sends for %d seconds",
+                failures, _CIRCUIT_OPEN_SECONDS
+            )
+    
+    def send_message(self, message: str) -> bool:
+        """
+        Send message to Slack via webhook.
+        
+        Args:
+            message: Message to send
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        payload = {
+            "text": message,
+            "mrkdwn": True
+        }
+        return self._post_payload(payload, "message")
     
     def send_billing_report(self, billing_report: Dict[str, Any]) -> bool:
         """
-        Send billing report to Slack.
+        Send billing report to Slack as a single Block Kit message.
+        
+        Slack webhooks are rate-limited to about one request per second, so
+        the whole report goes out in one POST rather than one per section.
         
         Args:
             billing_report: Billing report data
             
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.send_combined(billing_report)
+    
+    def send_combined(self, billing_report: Dict[str, Any],
+                      alerts: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Send billing report and any alerts to Slack in one webhook POST.
+        
+        Args:
+            billing_report: Billing report data
+            alerts: Alerts as dicts with 'title', 'message' and optional 'color'
+            
         Returns:
             True if successful, False otherwise
         """
         message = self.format_billing_message(billing_report)
-        return self.send_message(message)
+        payload = {
+            "text": message,  # Fallback for notifications and clients without blocks
+            "blocks": [
+                _REPORT_HEADER_BLOCK,
+                {
+                    "type": "section",
+                    "text": {"type": "mrkdwn", "text": message}
+                }
+            ]
+        }
+        if alerts:
+            ts = int(time.time())
+            payload["attachments"] = [
+                {
+                    "title": alert["title"],
+                    "text": alert["message"],
+                    "color": alert.get("color", "warning"),
+                    "footer": _ALERT_FOOTER,
+                    "ts": ts
+                }
+                for alert in alerts
+            ]
+            return self._post_payload(payload, f"billing report with {len(alerts)} alert(s)")
+        return self._post_payload(payload, "billing report")
     
     def send_alert(self, title: str, message: str, color: str = "warning") -> bool:
         """
@@ -131,33 +329,15 @@ class SlackIntegration:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            payload = {
-                "attachments": [
-                    {
-                        "title": title,
-                        "text": message,
-                        "color": color,
-                        "footer": "AWS Billing Monitor",
-                        "ts": int(datetime.now().timestamp())
-                    }
-                ]
-            }
-            
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Alert sent to Slack: {title}")
-                return True
-            else:
-                logger.error(f"Failed to send alert to Slack. Status: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending alert to Slack: {e}")
-            return False 
\ No newline at end of file
+        payload = {
+            "attachments": [
+                {
+                    "title": title,
+                    "text": message,
+                    "color": color,
+                    "footer": _ALERT_FOOTER,
+                    "ts": int(time.time())
+                }
+            ]
+        }
+        return self._post_payload(payload, f"alert '{title}'")
@@ -2,57 +2,45 @@
 """
 Test script to verify the project setup and dependencies.
 """
+import importlib
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 def test_imports():
     """Test if all required modules can be imported."""
     print("Testing imports...")
     
-    try:
-        import boto3
-        print("✓ boto3 imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import boto3: {e}")
-        return False
-    
-    try:
-        import requests
-        print("✓ requests imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import requests: {e}")
-        return False
-    
-    try:
-        import pydantic
-        print("✓ pydantic imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import pydantic: {e}")
-        return False
+    # (module, label) pairs; the imports are independent, so run them in
+    # parallel and report in this order
+    modules = [
+        ("boto3", "boto3"),
+        ("requests", "requests"),
+        ("config", "config module"),
+        ("aws_billing", "aws_billing module"),
+        ("integrations.slack_integration", "slack_integration module"),
+    ]
     
-    try:
-        from config import config
-        print("✓ config module imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import config: {e}")
-        return False
+    def try_import(name):
+        try:
+            importlib.import_module(name)
+            return None
+        except ImportError as e:
+            return e
     
-    try:
-        from aws_billing import AWSBillingAnalyzer
-        print("✓ aws_billing module imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import aws_billing: {e}")
-        return False
+    with ThreadPoolExecutor(max_workers=len(modules)) as executor:
+        errors = list(executor.map(try_import, [name for name, _ in modules]))
     
-    try:
-        from integrations.slack_integration import SlackIntegration
-        print("✓ slack_integration module imported successfully")
-    except ImportError as e:
-        print(f"✗ Failed to import slack_integration: {e}")
-        return False
+    all_good = True
+    for (name, label), error in zip(modules, errors):
+        if error is None:
+            print(f"✓ {label} imported successfully")
+        else:
+            print(f"✗ Failed to import {name}: {error}")
+            all_good = False
     
-    return True
+    return all_good
 
 def test_config():
     """Test configuration loading."""
@@ -93,7 +81,7 @@ def test_environment():
     for var in required_vars:
         value = os.getenv(var)
         if value:
-            print(f"✓ {var}: {'*' * len(value)} (configured)")
+            print(f"✓ {var}: ******** (configured)")
         else:
             print(f"✗ {var}: Not configured (required)")
             all_good = False
@@ -101,7 +89,7 @@ def test_environment():
     for var in optional_vars:
         value = os.getenv(var)
         if value:
-            print(f"✓ {var}: {'*' * len(value)} (configured)")
+            print(f"✓ {var}: ******** (configured)")
         else:
             print(f"⚠ {var}: Not configured (optional)")
     